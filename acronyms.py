@@ -0,0 +1,500 @@
+# --- FlexiTerm: acronym recognition
+
+# --- explicit acronyms are defined in text, e.g. retinoic acid receptor (RAR);
+#     implicit acronyms are frequent tokens that look like acronyms and are
+#     matched against term candidates whose words start with their letters
+
+import math
+import pprint
+import re
+import jellyfish
+from textnorm import greek2english, pad
+
+
+
+
+
+# --- assumption: acronyms are explicitly defined in text, e.g. 
+#     ... blah blah retinoic acid receptor (RAR) blah blah ...
+#                   ~~~~~~~~~~~~~~~~~~~~~~  ~~~
+
+# --- based on this paper:
+#     Schwartz A & Hearst M (2003) 
+#     A simple algorithm for identifying abbreviation definitions in biomedical text, 
+#     Pacific Symposium on Biocomputing 8:451-462 [http://biotext.berkeley.edu/software.html]
+
+
+
+
+
+# --- checks if a string looks like an acronym
+
+def isValidShortForm(string):
+
+    string = greek2english(string)
+    
+    if len(string) < 2:                                                                       # --- acronym too short
+        return False
+    elif len(string) > 8:                                                                     # --- acronym too long
+        return False
+    elif not(any(char.isupper() for char in string)):                                         # --- no uppercase
+        return False
+    elif (sum([int(c.islower()) for c in string]) > sum([int(c.isupper()) for c in string])): # --- more lowercase than uppercase
+        return False
+    elif not(string[0].isalpha() or string[0].isdigit() or string[0] == '('):                 # --- invalid first character
+        return False
+    elif (len(re.sub('[a-z0-9\s\'/\-]', '', string.lower())) > 0):                            # --- invalid characters present
+        return False
+    elif string[1] == "'":                                                                    # --- 2nd character ' as in A'
+        return False
+
+    return True
+
+
+
+
+
+# --- processes the context (i.e. definition) to extract the best long form for a given acronym
+
+def bestLongForm(acronym, definition):
+    
+    # --- case-insensitive matching
+    acronym = acronym.replace("-", "").lower()
+    definition = definition.lower()
+    d = len(definition) - 1
+
+    # --- go through the acronym & definition character by character,
+    #     FROM RIGHT TO LEFT looking for a match
+
+    for a in range(len(acronym) - 1, -1, -1):
+        
+        c = acronym[a]
+
+        if (c.isalpha() or c.isdigit()):    # --- match an alphanumeric character
+            
+            while ((d >= 0 and definition[d] != c) or (a == 0 and d > 0 and (definition[d-1].isalpha() or definition[d-1].isdigit()))):
+                d -= 1                      # --- keep moving to the left
+
+        if (d < 0):                         # --- match failed
+            return None
+        else:                               # --- match found
+            d -= 1                          # --- skip the matching character and then continue matching
+
+    d = definition.rfind(' ', 0, d+1) + 1   # --- complete the left-most word (up to the white space)
+
+    definition = definition[d:].strip()     # --- delete the surplus text on the left
+
+    if definition.startswith('an '):     definition = definition[3:]    # --- starts with a determiner?
+    elif definition.startswith('a '):    definition = definition[2:]
+    elif definition.startswith('the '):  definition = definition[4:]
+    elif (definition.startswith('[') and definition.endswith(']')):     # --- [definition]
+        definition = definition[1:-1]
+    elif (definition.startswith("'") and definition.endswith("'")):     # --- 'definition'
+        definition = definition[1:-1]
+
+    return definition
+
+
+
+
+
+# --- extracts all potential (acronym, definition) pairs from a given sentence
+
+def extractPairs(sentence):
+    
+    pairs = []
+
+    # --- remove double quotes
+    sentence = sentence.replace('"', ' ')
+    
+    # --- normalise white spaces
+    sentence = re.sub('\s+', ' ', sentence)
+    
+    acronym = ''
+    definition = ''
+    o = sentence.find(' (')   # --- find (
+    c = -1                    # --- ) index
+    tmp = -1
+
+    while (1 == 1):
+
+        if (o > -1):
+            o +=1                       # --- skip white space, i.e. ' (' -> '('
+            c = sentence.find(')', o)   # --- find closed parenthesis
+            
+            # --- extract candidates for (acronym, definition)
+            if (c > -1):
+                # --- find the start of the previous clause based on punctuation
+                cutoff = max(sentence.rfind('. ', 0, o), sentence.rfind(', ', 0, o))
+                if (cutoff == -1): cutoff = -2
+
+                definition = sentence[cutoff + 2:o].strip()
+                acronym = sentence[o + 1:c].strip()
+        
+        if (len(acronym) > 0 or len(definition) > 0): # --- candidates successfully instantiated above
+
+            if (len(acronym) > 1 and len(definition) > 1):
+                # --- look for parentheses nested within the candidate acronym
+                nextc = sentence.find(')', c + 1)
+                if (acronym.find('(') > -1 and nextc > -1):
+                    acronym = sentence[o + 1:nextc]
+                    c = nextc
+
+                # --- if separator found within parentheses, then trim everything after it
+                tmp = acronym.find(', ')
+                if (tmp > -1): acronym = acronym[0:tmp]
+                tmp = acronym.find('; ')
+                if (tmp > -1): acronym = acronym[0:tmp]
+                tmp = acronym.find(' or ')
+                if (tmp > -1): acronym = acronym[0:tmp]
+                if (tmp > -1): acronym = acronym[0:tmp]
+
+                # --- (or ...) -> (...)
+                tmp = acronym.find('or ')
+                if (tmp == 0): acronym = acronym[3:]
+
+                tokens = acronym.split()
+                if (len(tokens) > 3 or len(acronym) > len(definition)):
+                    # --- definition found within (...)
+                
+                    # --- extract the last token before "(" as a candidate for acronym
+                    tmp = sentence.rfind(' ', 0, o - 2)
+                    substr = sentence[tmp + 1:o - 1]
+                
+                    # --- swap acronym & definition
+                    definition = acronym
+                    acronym = substr
+                    
+                    # --- validate (... definition ...)
+                    if (len(definition.replace('-', ' ').split(' ')) > len(acronym) + 2):
+                        acronym = '' # --- delete acronym
+
+            acronym = acronym.strip()
+            definition = definition.strip()
+
+            if (isValidShortForm(acronym)):
+                blf = matchPair(acronym, definition)
+                if blf != None: 
+
+                    # --- NOTE: blf is already in lowercase
+                    
+                    pairs.append([acronym, blf])
+
+            # --- prepare to process the rest of the sentence after ")"
+            sentence = sentence[c + 1:]
+
+        elif (o > -1): sentence = sentence[o + 1:] # --- process the rest of the sentence
+
+        acronym = ''
+        definition = ''
+    
+        o = sentence.find(' (')
+        if o < 0: return pairs
+
+
+
+
+
+# --- finds the best match for an acronym and checks if it looks like a valid long form
+
+def matchPair(acronym, definition):
+    
+    # --- abort if acronym too short
+    if (len(acronym) < 2): return None
+    
+    # --- find the long form
+    blf = bestLongForm(acronym, definition)
+
+    # --- abort if no long form found
+    if (blf == None): return None
+
+    # --- t = the number of tokens in the long form
+    t = len(blf.replace('-', ' ').split(' '))
+    
+    # --- c = the number of alphanumeric characters in the acronym
+    c = sum([int(char.isalpha() or char.isdigit()) for char in acronym])
+
+    # --- case-insensitive matching; NOTE: blf is already in lowercase
+    acronym = acronym.lower().replace(' ', '')
+    
+    # --- sanity check
+    if len(blf) < 8:                           # --- long form too short
+        return None
+    elif len(blf) <= len(acronym):             # --- long form < short form
+        return None
+    elif blf.startswith(acronym + ' '):        # --- acronym nested in the long form
+        return None
+    elif blf.find(' ' + acronym + ' ') > -1:   # --- acronym nested in the long form
+        return None
+    elif blf.endswith(' ' + acronym):          # --- acronym nested in the long form
+        return None
+    elif acronym[0:1] != blf[0:1]:             # --- they don't start with the same letter
+        return None
+    elif t > 2*c or t > c+5:                   # --- too many tokens in the long form
+        return None
+    elif blf.find('[') >= 0 or blf.find(']') >= 0:
+        return None
+    else:                                       # --- no match in the last two tokens
+        tokens = blf.split()
+        if len(tokens) > 2:
+            last2 = " ".join(tokens[-2:])
+            if last2 == last2.replace(acronym[-1], ""):
+                return None
+
+        # --- delete all other letters from the definition: a token with no match will disappear
+        remainder = re.sub("[^ "+acronym.replace('-', '')+"]", "", blf)
+        tokens = len(remainder.split())
+        #if len(acronym) - tokens >= 2:          # --- at least two unmatched tokens
+        if len(blf.split()) - tokens >= 2:       # --- at least two unmatched tokens
+            return None
+           
+    return blf
+
+
+# # --- explicit acronym recognition
+
+
+
+
+# --- compare two acronym definitions and return the preferred one
+
+def preferred(nlp, acronym, definition1, definition2):
+    # --- lemmatise and lowercase both definitions
+    def1 = " ".join([token.lemma_.lower() for token in nlp(definition1.replace('-', ' '))])
+    def2 = " ".join([token.lemma_.lower() for token in nlp(definition2.replace('-', ' '))])
+    
+    def1_def2 = pad(def1)
+    for token in def2.split(): def1_def2 = re.sub(pad(token), " ", def1_def2)
+    def1_def2 = def1_def2.strip()
+    
+    def2_def1 = pad(def2)
+    for token in def1.split(): def2_def1 = re.sub(pad(token), " ", def2_def1)
+    def2_def1 = def2_def1.strip()
+
+    if def1_def2 == "":                                     # --- nuclear factor kappa B vs nuclear REGULATORY factor kappa B
+        if len(acronym) == len(def2.split()):               # --- prefer potential initialism
+            return definition2
+        else: 
+            return definition1
+    elif def2_def1 == "":                                   # --- nuclear REGULATORY factor kappa B vs nuclear factor kappa B
+        if len(acronym) == len(def1.split()):               # --- prefer potential initialism
+            return definition1
+        else: 
+            return definition2
+    elif bestLongForm(def1_def2, def2_def1) == def2_def1:   # --- GC receptor vs glucocorticoid receptor
+        return definition2
+    elif bestLongForm(def2_def1, def1_def2) == def1_def2:   # --- glucocorticoid receptor vs GC receptor
+        return definition1
+    else:
+        sim = jellyfish.jaro_winkler_similarity(def1, def2)
+        if sim < 0.7:                                       # --- ambiguous acronym
+            return 'xxx'
+        elif len(def1_def2) < len(def2_def1):               # --- keep the shorter one
+            return definition1
+        else:
+            return definition2
+
+
+
+
+
+# --- store acronym definitions found in sentences loaded after the given rowid
+#     (see FlexiTerm.load), the others are already stored in term_definition
+def explicit_definitions(con, nlp, loaded=0):
+
+    cur1 = con.cursor()
+    cur2 = con.cursor()
+
+    # --- extract sentences that contain a pair of parentheses, e.g.
+    #     ... blah blah ( blah blah ) blah blah ...
+
+    cur1.execute("SELECT id, sentence FROM data_sentence WHERE rowid > ? AND tags LIKE '%-LRB- % -RRB-%';", (loaded,))
+    rows1 = cur1.fetchall()
+    for row1 in rows1:
+        sentence_id = row1[0]
+        sentence = row1[1]
+
+        # --- extract all acronym definitions
+        pairs = extractPairs(sentence)
+    
+        for i in range(len(pairs)):
+            # --- parse definition by spacy so that it is comparable to previously extracted MWT candidates
+            definition = nlp(pairs[i][1])
+            acronym = pairs[i][0]
+            value = " ".join([token.text for token in definition])
+            cur2.execute("INSERT INTO term_definition(sentence_id, acronym, phrase) VALUES(?,?,?);", (sentence_id, acronym, value))
+
+def explicit_acronyms(con, nlp):
+
+    cur1 = con.cursor()
+    cur2 = con.cursor()
+
+    ###
+    cur1.execute("DELETE FROM term_acronym;")
+    ###
+
+    dictionary = {} # --- create a JSON dictionary of short/long forms
+
+    # --- definitions in the order of documents and sentences (see explicit_definitions)
+    #     NOTE: not in the order of loading, which differs after an incremental update
+    cur1.execute("""SELECT D.acronym, D.phrase
+                    FROM   term_definition D, data_sentence S
+                    WHERE  D.sentence_id = S.id
+                    ORDER BY S.doc_id, S.position, D.rowid;""")
+    rows1 = cur1.fetchall()
+    for row1 in rows1:
+        # --- store definition to the dictionary
+        acronym = row1[0]
+        value = row1[1]
+        cur2.execute("INSERT INTO tmp_acronym(acronym, phrase) VALUES(?,?);", (acronym, value)) # --- for debugging
+        if acronym in dictionary.keys():
+            dictionary[acronym] = preferred(nlp, acronym, value, dictionary[acronym])
+        else:
+            dictionary[acronym] = value
+
+    # --- print dictionary to log
+    pp = pprint.PrettyPrinter(indent=4)
+    pp.pprint(dictionary)
+
+    # --- store acronyms as MWT candidates
+    for key in dictionary.keys():
+        phrase = dictionary[key]
+        if phrase != 'xxx': # --- ignore ambiguous acronyms
+            cur1.execute("""INSERT INTO term_acronym(acronym, phrase, normalised)
+                            SELECT DISTINCT ?, ?, normalised
+                            FROM   term_phrase
+                            WHERE  LOWER(?) = LOWER(phrase);""", (key, phrase, phrase))
+    return
+
+
+# # --- implicit acronym recognition
+
+
+
+
+# --- assumptions: 
+#     (1) acronyms are frequently used
+#     (2) expanded form also used in the corpus, but
+#        these two are probably not linked explicitly
+#        e.g. blah ACL blah blah ACL blah blah anterior cruciate ligament blah blah 
+#                  ~~~           ~~~           ~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# --- find tokens that are potential acronyms:
+#     (1) must contain an UPPERCASE letter, but no lowercase letters
+#     (2) must not start with - (avoids e.g. -LRB-)
+#     (3) must not end with . (avoids MR. so and so)
+#     (4) has to be at least 3 characters long as shorter ones are 
+#         likely to introduce false positive expanded forms as they 
+#         are more likely to match a random phrase as an expanded form 
+#         candidate
+#     (5) acronyms are frequently used, so a threshold is set to >MIN times
+
+def implicit_acronyms(con, Amin):
+
+    cur1 = con.cursor()
+    cur2 = con.cursor()
+    cur3 = con.cursor()
+
+    cur1.execute("DELETE FROM tmp_acronym;")
+    cur1.execute("DELETE FROM term_acronym;")
+
+    # --- find tokens that look like acronyms
+    cur1.execute("""SELECT token, COUNT(*)
+                    FROM   data_token
+                    WHERE  UPPER(token) = token
+                    AND    LENGTH(token) < 6
+                    AND    token GLOB '[A-Z][A-Z]*[A-Z]'
+                    GROUP BY token
+                    HAVING COUNT(*) > ?;""", (Amin,))
+    rows1 = cur1.fetchall()
+    for row1 in rows1:
+        acronym = row1[0]
+        length  = len(acronym)
+        pattern = ""
+    
+        # --- create a LIKE pattern to retrieve matching phrases
+        for i in range (0, length): pattern += acronym[i] + "% "
+        pattern = pattern.strip()
+
+        # --- extract potential expanded forms
+        cur2.execute("""INSERT INTO tmp_acronym(acronym, normalised)
+                        SELECT DISTINCT ?, normalised
+                        FROM   term_phrase
+                        WHERE  phrase LIKE ?
+                        AND    LENGTH(phrase) - LENGTH(REPLACE(phrase, ' ', '')) = ? - 1;""", (acronym, pattern, length))
+
+    # --- check number of senses
+    cur1.execute("SELECT acronym, COUNT(*) FROM tmp_acronym GROUP BY acronym;")
+    rows1 = cur1.fetchall()
+    for row1 in rows1:
+        acronym = row1[0]
+        senses = row1[1]
+        
+        cosine = {} # --- calculate cosine similarity based on verbs that co-occur in the same sentence
+
+        # --- sqrt(sum(verb:count^2)) for the acronym
+        cur2.execute("DELETE FROM v1;")
+        cur2.execute("""INSERT INTO v1(lemma, value)
+                        SELECT lemma, COUNT(*)
+                        FROM   data_token
+                        WHERE  sentence_id IN (SELECT sentence_id FROM data_token WHERE token=?)
+                        AND    gtag = 'VB' AND lemma NOT IN ('be', 'have', 'do') GROUP BY lemma;""", (acronym,))
+        cur2.execute("SELECT SUM(value*value) FROM v1;")
+        norm1 = cur2.fetchone()[0]
+        if norm1 != None: norm1 = math.sqrt(norm1)
+        else:             norm1 = 0
+        
+        if norm1 > 0:
+            # --- for each sense
+            cur2.execute("SELECT normalised FROM tmp_acronym WHERE acronym = ?;", (acronym,))
+            rows2 = cur2.fetchall()
+            for row2 in rows2:
+                
+                # --- get sense
+                normalised = row2[0]
+                
+                # --- frequency of occurrence
+                cur3.execute("SELECT COUNT(*) FROM term_phrase WHERE normalised = ?;", (normalised,))
+                f = cur3.fetchone()[0]
+            
+                if f > 1: # --- ignore single occurrences (outliers)
+                    
+                    # --- sqrt(sum(verb:count^2)) for the sense
+                    cur3.execute("DELETE FROM v2;")
+                    cur3.execute("""INSERT INTO v2(lemma, value)
+                                    SELECT lemma, COUNT(*)
+                                    FROM   data_token
+                                    WHERE  sentence_id IN (SELECT sentence_id FROM term_phrase WHERE normalised = ?)
+                                    AND    gtag = 'VB' AND lemma NOT IN ('be', 'have', 'do') GROUP BY lemma;""", (normalised,))
+                    cur3.execute("SELECT SUM(value*value) FROM v2;")
+                    norm2 = cur3.fetchone()[0]
+                    if norm2 != None: norm2 = math.sqrt(norm2)
+                    else:             norm2 = 0
+                    
+                    if norm2 > 0:
+                        # --- scalar product: sum(verb:count_acronym*verb:count_sense)
+                        cur3.execute("""SELECT SUM(v1.value * v2.value)
+                                        FROM   v1, v2
+                                        WHERE  v1.lemma = v2.lemma;""")
+                        product = cur3.fetchone()[0]
+                        if product != None: cosine[normalised] = product / (norm1*norm2)
+                        else:               cosine[normalised] = 0
+
+        if cosine:
+            # --- find the most similar sense
+            normalised = max(cosine, key=lambda k: cosine[k])
+            similarity = max(cosine.values())
+        
+            # --- find the most common phrase for the given normalised form
+            cur2.execute("""SELECT LOWER(phrase), COUNT(*) AS C
+                            FROM   term_phrase
+                            WHERE  normalised = ?
+                            ORDER BY C DESC;""", (normalised,))
+            phrase = cur2.fetchone()[0]
+
+            print(acronym, '\t', phrase, '\t', normalised, '\t', similarity)
+        
+            # --- store acronym definition
+            cur2.execute("""INSERT INTO term_acronym(acronym, phrase, normalised) VALUES(?,?,?);""", (acronym, phrase, normalised))
+        
+    return
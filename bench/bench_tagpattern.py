@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# --- benchmark: matching term formation patterns against long sentences
+#     (e.g. tables or lists that the sentence splitter fails to break up)
+#
+#     usage: python bench/bench_tagpattern.py
+
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from tagpattern import TagPattern
+
+
+# --- the default pattern (see flexiterm.py)
+pattern = "(((((NN|JJ) )*NN) IN (((NN|JJ) )*NN))|((NN|JJ )*NN POS (NN|JJ )*NN))|(((NN|JJ) )+NN( CD)?)"
+
+# --- a mix of tags typical of tables: nouns, numbers, punctuation
+vocabulary = ["NN", "NN", "NN", "JJ", "JJ", "CD", "CD", "IN", "PUN", "VB", "DT", "-LRB-", "-RRB-"]
+
+
+# --- previous implementation: count spaces in front of each match
+def count_spaces(regex, tags):
+    for chunk in re.finditer(regex, tags):
+        start = tags[:chunk.span()[0]].count(' ')+1
+        length = tags[chunk.span()[0]:chunk.span()[1]].count(' ')+1
+        yield start, length
+
+
+def sentence(length):
+    return " ".join([random.choice(vocabulary) for i in range(length)])
+
+
+def timed(function, sentences, repeat):
+    best = None
+    for r in range(repeat):
+        start_time = time.perf_counter()
+        for tags in sentences:
+            for match in function(tags): pass
+        run_time = time.perf_counter() - start_time
+        if best == None or run_time < best: best = run_time
+    return best
+
+
+random.seed(0)
+
+regex = re.compile(pattern)
+engine = TagPattern(pattern)
+
+print("%10s %10s %12s %12s %8s" % ("tokens", "sentences", "old (s)", "new (s)", "speed-up"))
+for length in [25, 100, 1000, 5000, 20000]:
+    sentences = [sentence(length) for i in range(max(1, 20000 // length))]
+
+    # --- both implementations must find the same tokens
+    for tags in sentences:
+        assert list(count_spaces(regex, tags)) == list(engine.finditer(tags))
+
+    old = timed(lambda tags: count_spaces(regex, tags), sentences, 3)
+    new = timed(engine.finditer, sentences, 3)
+    print("%10d %10d %12.4f %12.4f %7.1fx" % (length, len(sentences), old, new, old / new))
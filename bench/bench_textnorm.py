@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# --- benchmark: text normalisation helpers applied to every document, token and acronym candidate
+#
+#     usage: python bench/bench_textnorm.py [folder]   (default: ./text)
+#
+#     The previous implementations are kept below as a reference: the output of
+#     both must be identical on the corpus and on randomly generated strings.
+
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import textnorm
+
+
+# # --- previous implementations
+
+def legacy_pretagging(txt):
+
+    unit = ["meter", "metre", "mile", "centi", "milli", "kilo", "gram", "sec", "min", "hour", "hr",
+            "day", "week", "month", "year", "liter", "litre"]
+
+    abbr = ["m", "cm", "mm", "kg", "g", "mg", "s", "h", "am", "pm", "l", "ml"]
+
+    for u in unit:
+        txt = re.sub("(\\d)" + u, "\\1 " + u, txt)
+
+    for a in abbr:
+        txt = re.sub("(\\d)" + a, "\\1 " + a, txt)
+
+    txt = re.sub("\\!+", "!", txt)
+    txt = re.sub("\\?+", "?", txt)
+    txt = re.sub("\\.+", ".", txt)
+    txt = re.sub("\\-+", "-", txt)
+    txt = re.sub("_+", "_", txt)
+    txt = re.sub("~+", "~", txt)
+    txt = re.sub("kappaB", "kappa B", txt)
+    txt = re.sub('([a-z0-9])/([a-z0-9])', '\\1 / \\2', txt, flags=re.IGNORECASE)
+    txt = re.sub("\\(", " ( ", txt, flags=re.IGNORECASE)
+    txt = re.sub("\\)", " ) ", txt, flags=re.IGNORECASE)
+    txt = re.sub("[ACGT ]{6,}", "", txt);
+    txt = re.sub("\\s+", " ", txt)
+
+    return txt
+
+def legacy_hyphen(txt):
+    txt = re.sub('([a-z])\\-([a-z])', '\\1 \\2', txt, flags=re.IGNORECASE)
+    txt = re.sub('([a-z])\\-([a-z])', '\\1 \\2', txt, flags=re.IGNORECASE)
+    return txt
+
+def legacy_prestem(lemma):
+    if len(lemma) > 1:
+        if lemma[0:1] == '-': lemma = lemma[1:]
+    if len(lemma) > 1:
+        if lemma[-1:] == '-': lemma = lemma[:-1]
+    lemma = re.sub('isation', 'ization', lemma)
+    return lemma
+
+def legacy_greek2english(string):
+    letters = ["alpha", "beta", "gamma", "delta", "epsilon", "zata", "eta", "theta", "iota","kappa", "lambda", "mu", "nu", "xi", "omikron", "pi", "rho", "sigma", "tau", "upsilon", "phi","chi", "psi", "omega"]
+    string = textnorm.pad(string)
+    for letter in letters:
+        string = re.sub(textnorm.pad(letter), textnorm.pad(letter[0:1]), string, flags=re.IGNORECASE)
+    return string.strip()
+
+
+# # --- test data
+
+# --- tricky cases: overlapping matches, repeated letters, units glued to numbers
+tricky = ["glutathione-S-transferase", "a-b-c-d-e-f", "ab-c-d", "x--y", "-isation-", "organisation",
+          "5mm 10mg/ml 3kg 2cm 12hr 7days 1am 9pm 4l 5ml 30sec 2min", "100kappaB/NF-kappaB",
+          "a/b/c", "(IL)-2", "ACGTACGTAC GT", "wait!!! what??? ... --- ___ ~~~",
+          "alpha", "alpha alpha alpha", "Alpha ALPHA beta", "alpha beta alpha", "TGF beta", "beta  beta",
+          "IFN gamma gamma", "eta beta zeta theta", "pi phi psi", "kappa B", "mu-opioid"]
+
+def fuzz(n, length):
+    pieces = ["alpha", "Beta", "eta", "pi", " ", " ", "  ", "-", "/", "(", ")", "5", "m", "mg", "ml",
+              "A", "C", "G", "T", "a", "x", "...", "!!", "kappaB", "isation", "\t", "\n"]
+    return ["".join([random.choice(pieces) for i in range(length)]) for j in range(n)]
+
+def corpus(folder):
+    texts = []
+    if os.path.isdir(folder):
+        for name in sorted(os.listdir(folder)):
+            path = os.path.join(folder, name)
+            if os.path.isfile(path):
+                with open(path, "r", encoding="utf8") as file: texts.append(file.read())
+    return texts
+
+
+# # --- benchmark
+
+def timed(function, inputs, repeat=5):
+    best = None
+    for r in range(repeat):
+        start_time = time.perf_counter()
+        for i in inputs: function(i)
+        run_time = time.perf_counter() - start_time
+        if best == None or run_time < best: best = run_time
+    return best
+
+random.seed(0)
+
+texts = corpus(sys.argv[1] if len(sys.argv) > 1 else "./text")
+if len(texts) == 0: texts = fuzz(100, 500)
+tokens = [token for text in texts for token in text.split()]
+shortforms = [token for token in tokens if any(c.isupper() for c in token)] + tricky
+
+helpers = [("pretagging",    legacy_pretagging,    textnorm.pretagging,    texts),
+           ("hyphen",        legacy_hyphen,        textnorm.hyphen,        [legacy_pretagging(text) for text in texts]),
+           ("prestem",       legacy_prestem,       textnorm.prestem,       tokens),
+           ("greek2english", legacy_greek2english, textnorm.greek2english, shortforms)]
+
+# --- the output must not change
+for (name, old, new, inputs) in helpers:
+    for i in inputs + tricky + fuzz(2000, 12):
+        assert old(i) == new(i), name + ": " + repr(i) + " -> " + repr(old(i)) + " vs " + repr(new(i))
+
+print("%-15s %10s %12s %12s %8s" % ("helper", "calls", "old (s)", "new (s)", "speed-up"))
+for (name, old, new, inputs) in helpers:
+    t_old = timed(old, inputs)
+    t_new = timed(new, inputs)
+    print("%-15s %10d %12.4f %12.4f %7.1fx" % (name, len(inputs), t_old, t_new, t_old / t_new))
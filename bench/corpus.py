@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# --- benchmark: synthetic biomedical-style corpus with planted multi-word terms
+#
+#     usage: python bench/corpus.py folder [documents] [seed]   (default: 1000 documents, seed 0)
+#
+#     Writes documents into folder/text and the planted terms into folder/planted.txt.
+#     Terms are planted with acronym definitions, hyphenation variants (T-cell vs T cell)
+#     and spelling variants (tumour vs tumor), so that every stage of the pipeline has
+#     something to do. The same arguments always produce the same corpus.
+
+import os
+import random
+import sys
+
+
+# --- building blocks of terms: modifiers + heads
+modifiers = ["tumour", "necrosis", "growth", "nerve", "epidermal", "vascular", "endothelial", "insulin",
+             "protein", "tyrosine", "receptor", "signal", "transduction", "cell", "cycle", "bone",
+             "marrow", "blood", "pressure", "heart", "lung", "liver", "kidney", "oxidative", "stress",
+             "immune", "inflammatory", "haemoglobin", "oestrogen", "colour", "mitochondrial", "membrane",
+             "nuclear", "gene", "expression", "plasma", "serum", "platelet", "smooth", "muscle",
+             "amino", "acid", "fatty", "glucose", "metabolic", "chronic", "acute", "clinical"]
+
+heads = ["factor", "kinase", "receptor", "pathway", "syndrome", "disease", "transplantation",
+         "failure", "injury", "response", "activation", "regulation", "level", "concentration",
+         "inhibitor", "antibody", "channel", "complex", "function", "damage", "therapy", "analysis"]
+
+# --- British -> American spelling
+spelling = {"tumour": "tumor", "haemoglobin": "hemoglobin", "oestrogen": "estrogen", "colour": "color",
+            "organisation": "organization", "randomised": "randomized", "analysed": "analyzed"}
+
+# --- filler words
+subjects = ["patients", "mice", "samples", "cells", "controls", "volunteers", "cultures", "tissues"]
+verbs    = ["increased", "decreased", "was associated with", "was measured in", "correlated with",
+            "was observed in", "was analysed in", "did not affect", "was reduced by", "predicted"]
+linkers  = ["In this study,", "However,", "Furthermore,", "In contrast,", "Moreover,", "Interestingly,", "Overall,"]
+numbers  = ["12", "25", "48", "3.5", "0.05", "100", "7"]
+
+
+def plant(rng, count):
+    terms = set()
+    while len(terms) < count:
+        n = rng.choice([1, 1, 2, 2, 3])
+        terms.add(" ".join(rng.sample(modifiers, n) + [rng.choice(heads)]))
+    return sorted(terms)
+
+
+def acronym(term):
+    return "".join([word[0] for word in term.split()]).upper()
+
+
+# --- a term as it occurs in text: possibly with a spelling or hyphenation variant
+def variant(rng, term):
+    words = term.split()
+    if rng.random() < 0.2: words = [spelling.get(word, word) for word in words]
+    if len(words) > 2 and rng.random() < 0.15:
+        i = rng.randrange(len(words) - 1)
+        words[i:i+2] = [words[i] + "-" + words[i+1]]
+    return " ".join(words)
+
+
+def sentence(rng, terms, defined):
+    term = rng.choice(terms)
+    other = rng.choice(terms)
+
+    # --- define an acronym the first time it is used in a document, then use it
+    if term in defined:
+        mention = acronym(term) if rng.random() < 0.5 else variant(rng, term)
+    elif len(term.split()) > 1 and rng.random() < 0.3:
+        defined.add(term)
+        mention = variant(rng, term) + " (" + acronym(term) + ")"
+    else:
+        mention = variant(rng, term)
+
+    words = [rng.choice(linkers) if rng.random() < 0.3 else "",
+             "the", mention, rng.choice(verbs), rng.choice(subjects),
+             "with", variant(rng, other)]
+    if rng.random() < 0.3: words += ["at", rng.choice(numbers), rng.choice(["mg", "ml", "hours", "days"])]
+    text = " ".join([word for word in words if word != ""])
+    return text[0].upper() + text[1:] + "."
+
+
+def document(rng, terms):
+    defined = set()
+    return " ".join([sentence(rng, terms, defined) for i in range(rng.randint(5, 12))])
+
+
+def generate(folder, documents, seed=0):
+    rng = random.Random(seed)
+    terms = plant(rng, max(50, min(2000, documents // 5)))
+
+    # --- replace documents generated previously
+    os.makedirs(os.path.join(folder, "text"), exist_ok=True)
+    for name in os.listdir(os.path.join(folder, "text")):
+        if name.endswith(".txt"): os.remove(os.path.join(folder, "text", name))
+
+    for i in range(documents):
+        # --- a subset of terms per document, so that term frequencies follow a skewed distribution
+        subset = rng.sample(terms, 10) + rng.sample(terms[:len(terms) // 10], 3)
+        with open(os.path.join(folder, "text", "%07d.txt" % (i+1)), "w", encoding="utf8") as file:
+            file.write(document(rng, subset) + "\n")
+
+    with open(os.path.join(folder, "planted.txt"), "w", encoding="utf8") as file:
+        for term in terms: file.write(term + "\n")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python bench/corpus.py folder [documents] [seed]")
+        sys.exit(1)
+    folder = sys.argv[1]
+    documents = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    generate(folder, documents, seed)
+    print(documents, "documents written to", os.path.join(folder, "text"))
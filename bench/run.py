@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# --- benchmark: run FlexiTerm on a corpus, report the time of each stage and
+#     compare the terminology against a reference (golden) run
+#
+#     usage: python bench/run.py corpus [--workdir folder] [--set name=value ...]
+#                                       [--golden terminology.csv] [--save-golden terminology.csv]
+#
+#     corpus is a folder of text files, e.g. ./text or folder/text created by
+#     bench/corpus.py. FlexiTerm runs in a separate working folder (default: a
+#     temporary one, or flexiterm-bench in the --workdir folder) with a copy of
+#     ./config, so the results in ./out are not touched. --set overrides settings, e.g. --set processes=4 --set page_size=1000.
+#     Run with --save-golden before an optimisation and with --golden after it to
+#     show that the ranking has not changed.
+
+import argparse
+import csv
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def prepare(workdir, corpus, overrides):
+    for name in ["config", "text", "out"]:
+        if os.path.exists(os.path.join(workdir, name)): shutil.rmtree(os.path.join(workdir, name))
+    shutil.copytree(os.path.join(root, "config"), os.path.join(workdir, "config"))
+    shutil.copytree(corpus, os.path.join(workdir, "text"))
+    os.makedirs(os.path.join(workdir, "out"))
+    for name in ["flexiterm.sqlite", "flexiterm.sqlite.spacy"]:
+        if os.path.exists(os.path.join(workdir, name)): os.remove(os.path.join(workdir, name))
+
+    # --- settings overrides: values are parsed as JSON where possible, e.g. 4, true, 0.95
+    path = os.path.join(workdir, "config", "settings.json")
+    with open(path, "r") as file: settings = json.load(file)
+    for override in overrides:
+        (name, value) = override.split("=", 1)
+        try: settings[name] = json.loads(value)
+        except ValueError: settings[name] = value
+    with open(path, "w") as file: json.dump(settings, file, indent=3)
+
+
+def run(workdir):
+    log = os.path.join(workdir, "run.log")
+    start_time = time.perf_counter()
+    with open(log, "w", encoding="utf8") as file:
+        result = subprocess.run([sys.executable, os.path.join(root, "flexiterm.py")], cwd=workdir, stdout=file, stderr=subprocess.STDOUT)
+    run_time = time.perf_counter() - start_time
+    if result.returncode != 0:
+        print("ERROR: FlexiTerm failed, see " + log)
+        sys.exit(1)
+    return run_time
+
+
+def report(workdir, run_time):
+    with open(os.path.join(workdir, "out", "performance.json"), "r", encoding="utf8") as file:
+        performance = json.load(file)
+    print("%-25s %10s %10s %10s %12s  %s" % ("stage", "wall (s)", "cpu (s)", "peak (MB)", "process (MB)", "rows"))
+    for stage in performance["startup"] + performance["stages"]:
+        rows = ", ".join([name + "=" + str(stage["rows"][name]) for name in stage["rows"]])
+        print("%-25s %10.3f %10.3f %10s %12s  %s" % (stage["stage"], stage["wall"], stage["cpu"], stage["peak_memory"], stage["peak_memory_process"], rows))
+    print("%-25s %10.3f %10.3f" % ("total", performance["wall"], performance["cpu"]))
+    print("%-25s %10.3f" % ("total (incl. start-up)", run_time))
+
+
+# --- recall of planted terms (see bench/corpus.py) among the term variants
+def recall(workdir, corpus):
+    planted = os.path.join(corpus, "..", "planted.txt")
+    if not os.path.isfile(planted): return
+    with open(planted, "r", encoding="utf8") as file:
+        terms = set([line.strip() for line in file if len(line.split()) > 1])
+    with open(os.path.join(workdir, "out", "terminology.csv"), "r", encoding="utf8") as file:
+        variants = set([row[1] for row in csv.reader(file, delimiter="\t")][1:])
+    print("planted terms recognised: %d / %d" % (len(terms & variants), len(terms)))
+
+
+def read(path):
+    with open(path, "r", encoding="utf8") as file:
+        return [row for row in csv.reader(file, delimiter="\t")]
+
+
+# --- compare terminology.csv with the golden one: the same terms, variants, scores and order
+def compare(workdir, golden):
+    expected = read(golden)
+    actual = read(os.path.join(workdir, "out", "terminology.csv"))
+    different = [(i, e, a) for i, (e, a) in enumerate(zip(expected, actual)) if e != a]
+    if len(expected) == len(actual) and len(different) == 0:
+        print("terminology.csv: SAME as " + golden + " (%d rows)" % len(actual))
+        return True
+    print("terminology.csv: DIFFERENT from " + golden)
+    print("  rows: %d expected, %d actual, %d different" % (len(expected), len(actual), len(different)))
+    for (i, e, a) in different[:10]:
+        print("  row %d: expected %s" % (i, e))
+        print("  row %d: actual   %s" % (i, a))
+    return False
+
+
+parser = argparse.ArgumentParser(description="FlexiTerm benchmark")
+parser.add_argument("corpus", help="folder of text files")
+parser.add_argument("--workdir", help="folder in which the working folder flexiterm-bench is created (default: a temporary folder)")
+parser.add_argument("--set", action="append", default=[], help="override a setting: name=value")
+parser.add_argument("--golden", help="reference terminology.csv to compare with")
+parser.add_argument("--save-golden", help="save terminology.csv as a reference")
+args = parser.parse_args()
+
+corpus = os.path.abspath(args.corpus)
+
+# --- NOTE: config, text and out are deleted in the working folder, so a given
+#     folder is never used as it is, only its flexiterm-bench subfolder
+if args.workdir == None:
+    workdir = tempfile.mkdtemp(prefix="flexiterm-bench-")
+else:
+    if os.path.realpath(args.workdir) == os.path.realpath(root):
+        parser.error("--workdir cannot be the FlexiTerm folder")
+    workdir = os.path.join(args.workdir, "flexiterm-bench")
+    if os.path.commonpath([os.path.realpath(corpus), os.path.realpath(workdir)]) == os.path.realpath(workdir):
+        parser.error("the corpus cannot be in " + workdir)
+os.makedirs(workdir, exist_ok=True)
+
+print("corpus :", corpus, "(%d files)" % len(os.listdir(corpus)))
+print("workdir:", workdir)
+
+prepare(workdir, corpus, args.set)
+run_time = run(workdir)
+report(workdir, run_time)
+recall(workdir, corpus)
+
+if args.save_golden != None:
+    shutil.copyfile(os.path.join(workdir, "out", "terminology.csv"), args.save_golden)
+    print("terminology.csv saved as " + args.save_golden)
+
+if args.golden != None and not compare(workdir, args.golden): sys.exit(1)
@@ -0,0 +1,9 @@
+DELETE FROM data_document;
+DELETE FROM data_sentence;
+DELETE FROM data_token;
+DELETE FROM term_candidate;
+DELETE FROM term_candidate_setting;
+DELETE FROM term_definition;
+DELETE FROM term_occurrence;
+DELETE FROM term_occurrence_variant;
+DELETE FROM term_occurrence_document;
\ No newline at end of file
@@ -39,6 +39,48 @@ CREATE TABLE IF NOT EXISTS term_phrase
   PRIMARY KEY(id),
   FOREIGN KEY(sentence_id) REFERENCES data_sentence(id)
 );
+CREATE TABLE IF NOT EXISTS term_candidate
+(
+  id			VARCHAR(60),
+  sentence_id	VARCHAR(50),
+  token_start	INT,
+  token_length	INT,
+  phrase		TEXT,
+  normalised	TEXT,
+  PRIMARY KEY(id),
+  FOREIGN KEY(sentence_id) REFERENCES data_sentence(id)
+);
+CREATE TABLE IF NOT EXISTS term_candidate_setting
+(
+  name		VARCHAR(30),
+  value		TEXT,
+  PRIMARY KEY(name)
+);
+CREATE TABLE IF NOT EXISTS term_definition
+(
+  sentence_id	VARCHAR(50),
+  acronym		TEXT,
+  phrase		TEXT,
+  FOREIGN KEY(sentence_id) REFERENCES data_sentence(id)
+);
+CREATE TABLE IF NOT EXISTS term_occurrence
+(
+  doc_id	VARCHAR(30),
+  start		INT,
+  offset	INT,
+  variant	TEXT,
+  FOREIGN KEY(doc_id) REFERENCES data_document(id)
+);
+CREATE TABLE IF NOT EXISTS term_occurrence_variant
+(
+  variant	TEXT,
+  PRIMARY KEY(variant)
+);
+CREATE TABLE IF NOT EXISTS term_occurrence_document
+(
+  doc_id	VARCHAR(30),
+  PRIMARY KEY(doc_id)
+);
 CREATE TABLE IF NOT EXISTS stopword
 (
   word	VARCHAR(30),
@@ -145,9 +187,6 @@ CREATE TABLE IF NOT EXISTS v2
   value	INT,
   PRIMARY KEY(lemma)
 );
-DELETE FROM data_document;
-DELETE FROM data_sentence;
-DELETE FROM data_token;
 DELETE FROM stopword;
 DELETE FROM term_acronym;
 DELETE FROM term_bag;
@@ -177,4 +216,8 @@ DROP INDEX IF EXISTS idx13;
 DROP INDEX IF EXISTS idx14;
 DROP INDEX IF EXISTS idx15;
 DROP INDEX IF EXISTS idx16;
-DROP INDEX IF EXISTS idx17;
\ No newline at end of file
+DROP INDEX IF EXISTS idx17;
+DROP INDEX IF EXISTS idx18;
+DROP INDEX IF EXISTS idx19;
+DROP INDEX IF EXISTS idx20;
+DROP INDEX IF EXISTS idx21;
\ No newline at end of file
@@ -0,0 +1,266 @@
+# --- FlexiTerm: export of results
+
+# --- rows are written to the output files as they are read from the database,
+#     so that the memory used does not grow with the size of the corpus
+
+import csv
+import json
+import re
+from contextlib import nullcontext
+from itertools import groupby, islice
+from multiprocessing import Pool
+from pathlib import Path
+
+
+def header(title, style=""):
+    return """<!DOCTYPE html>
+<html lang="en">
+<head>
+<title>""" + title + """</title>
+<style>""" + style + """</style>
+</head>
+<body style="font-size: 16px; font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Helvetica, Arial, sans-serif, 'Apple Color Emoji', 'Segoe UI Emoji', 'Segoe UI Symbol'; padding: 4rem 2rem; direction: ltr">"""
+
+
+
+
+
+# # --- annotations
+
+# --- spacy-formatted entity annotations, one document at a time
+def annotations(con):
+
+    cur1 = con.cursor()
+    cur2 = con.cursor()
+
+    # --- for each document
+    cur1.execute("SELECT id, document FROM data_document;")
+    for doc_id, doc in cur1:
+
+        # --- retrieve previously stored PhraseMatcher labels
+        ents = []
+        cur2.execute("SELECT start, offset, label FROM output_label WHERE doc_id = ?;", (doc_id,))
+        for row2 in cur2:
+            start = row2[0]
+            end = row2[0] + row2[1]
+            label = str(row2[2])
+            ents.append({"start": start, "end": end, "label": label})
+
+        yield {"text": doc, "ents": ents, "title": doc_id, "settings": {}}
+
+# --- export spacy-formatted entity annotations: a JSON array ("json") or one JSON object per line ("jsonl")
+# --- NOTE: the array is written one document at a time in the same layout as json.dump(..., indent=4)
+def annotations_json(path, annotations, format="json"):
+    with open(path, "w") as file:
+        if format == "jsonl":
+            for annotation in annotations: file.write(json.dumps(annotation) + "\n")
+            return
+        separator = "[\n"
+        for annotation in annotations:
+            file.write(separator)
+            file.write("\n".join(["    " + line for line in json.dumps(annotation, indent=4).split("\n")]))
+            separator = ",\n"
+        file.write("[]" if separator == "[\n" else "\n]")
+
+
+
+
+
+# # --- annotated corpus
+
+# --- render annotated documents as an HTML page, each document with an anchor: #D<doc_id>
+def render(annotations, options):
+    from spacy import displacy # --- NOTE: imported here, because it imports spacy
+    html = displacy.render(annotations, style="ent", manual=True, options=options, page=True, jupyter=False)
+    return re.sub('>([^<]+)</h2>', ' id="D\\1">\\1</h2>', html, flags=re.IGNORECASE)
+
+# --- write a page and return the ids of documents on it
+def page(job):
+    (path, annotations, options) = job
+    with open(path, "w", encoding="utf8") as file: file.write(render(annotations, options))
+    return [annotation["title"] for annotation in annotations]
+
+# --- split annotated documents into pages
+def pages(annotations, page_size):
+    annotations = iter(annotations)
+    while True:
+        shard = list(islice(annotations, page_size))
+        if len(shard) == 0: break
+        yield shard
+
+# --- index of pages: links to pages and redirection of links to documents,
+#     so that corpus.html#D<doc_id> keeps working
+def index(names, titles):
+    output = header("Corpus")
+    output += "\n<h1>Corpus</h1>\n<ol>"
+    for name, ids in zip(names, titles):
+        output += "\n    <li><a href='" + name + "'>" + ids[0] + " - " + ids[-1] + "</a></li>"
+    output += "\n</ol>"
+    location = {doc_id: name for name, ids in zip(names, titles) for doc_id in ids}
+    output += """
+<script>
+var location_of = """ + json.dumps(location) + """;
+var hash = decodeURIComponent(window.location.hash);
+if (hash.substring(0, 2) == "#D" && hash.substring(2) in location_of) {
+    window.location.replace(location_of[hash.substring(2)] + window.location.hash);
+}
+</script>
+</body>
+</html>"""
+    return output
+
+# --- annotated corpus: a single page (page_size = 0) or pages of page_size documents
+#     (corpus_1.html, corpus_2.html, ...) and an index page, optionally rendered in parallel
+def corpus(path, annotations, options, page_size=0, processes=1):
+
+    path = Path(path)
+
+    if page_size == 0:
+        page((path, list(annotations), options))
+        return
+
+    names = []
+    titles = []
+    jobs = pages(annotations, page_size)
+    with Pool(processes) if processes > 1 else nullcontext() as pool:
+        while True:
+            # --- NOTE: a few pages at a time, so that only these are kept in memory
+            batch = list(islice(jobs, max(processes, 1) * 2))
+            if len(batch) == 0: break
+            batch = [(path.with_name(path.stem + "_" + str(len(names) + i + 1) + path.suffix), shard, options) for i, shard in enumerate(batch)]
+            names += [job[0].name for job in batch]
+            titles += pool.map(page, batch) if pool != None else [page(job) for job in batch]
+
+    with open(path, "w", encoding="utf8") as file: file.write(index(names, titles))
+
+
+
+
+
+# # --- concordances
+
+def concordance(color, doc_id, left, term, right):
+    return """
+    <tr>
+        <td><a href='corpus.html#D"""+ doc_id +"""' target='_blank'>""" + doc_id + """</a></td>
+        <td style='text-align:right'>""" + left + """</td>
+        <td style='text-align:center;width:1px;white-space:nowrap;'>
+        <mark class="entity" style="background: """ + color + """; padding: 0.45em 0.6em; margin: 0 0.25em; line-height: 1; border-radius: 0.35em;">""" + term + """</mark>
+        </td>
+        <td>""" + right  + """</td>
+    </tr>"""
+
+def concordances(con, path, colors):
+
+    cur1 = con.cursor()
+
+    # --- rank terms by termhood
+    cur1.execute("DROP TABLE IF EXISTS temp.term_rank;")
+    cur1.execute("CREATE TEMP TABLE term_rank AS SELECT DISTINCT id FROM term_output ORDER BY c DESC;")
+    cur1.execute("SELECT rowid, id FROM term_rank ORDER BY rowid;")
+    terms = cur1.fetchall()
+
+    # --- all concordances in one pass: rank, doc_id, left context, term, right context
+    cur1.execute("""SELECT R.rowid,
+                           doc_id,
+                           SUBSTR(D.document, MAX(start+1-80, 1), MIN(start, 80)),
+                           SUBSTR(D.document, start+1, offset),
+                           SUBSTR(D.document, start+1+offset, 80)
+                    FROM   term_rank R, output_label L, data_document D
+                    WHERE  L.label = R.id
+                    AND    L.doc_id = D.id
+                    ORDER BY R.rowid, doc_id, start;""")
+    groups = groupby(cur1, key=lambda row: row[0])
+    group = next(groups, None)
+
+    with open(path, "w", encoding="utf8") as file:
+
+        # --- start an HTML document
+        file.write(header("Concordances"))
+        file.write("<h1>Term concordances</h1>")
+
+        for rank, id in terms:
+
+            file.write("\n<br/><br/>\n<h2 style='margin:0' id='T" + str(id) + "'>Term ID: <a href='terminology.html#L"+ str(id) +"' target='_blank'>"+ str(id) +"</a></h2><br/><table border='0'>")
+
+            if group != None and group[0] == rank:
+                for row in group[1]: file.write(concordance(colors[str(id)], row[1], row[2], row[3], row[4]))
+                group = next(groups, None)
+
+            # --- close the table
+            file.write("\n</table>")
+
+        # --- end the HTML document
+        file.write("\n</html>")
+
+    cur1.execute("DROP TABLE temp.term_rank;")
+
+
+
+
+
+# # --- terminology (lexicon)
+
+def terminology_csv(con, path):
+
+    cur1 = con.cursor()
+    cur1.execute("""SELECT id, variant, c, f, df, ROUND(c*idf, 3) AS c_idf
+                    FROM   term_output
+                    ORDER BY c DESC, id ASC, f DESC;""")
+
+    with open(path, "w", encoding="utf8") as file:
+        csv_writer = csv.writer(file, delimiter="\t")
+        csv_writer.writerow([i[0] for i in cur1.description])
+        csv_writer.writerows(cur1)
+
+def firstrow(rowspan, color, id, c, variant, f):
+    id = str(id)
+    c = str(round(c, 3))
+    f = str(f)
+    return """
+    <tr>
+        <td rowspan='""" + str(rowspan) + """' style='text-align:center'><a href='concordances.html#T""" + id + """' target='_blank'>""" + id + """</a></td>
+        <td rowspan='""" + str(rowspan) + """' style='text-align:center'>""" + c  + """</td>
+        <td id='L"""+ str(id) +"""' bgcolor='""" + color + """'>""" + variant + """</td>
+        <td style='text-align:center'>""" + f + """</td>
+    </tr>"""
+
+def nextrow(color, variant, f):
+    f = str(f)
+    return """
+    <tr>
+        <td bgcolor='""" + color + """'>""" + variant + """</td>
+        <td style='text-align:center'>""" + f + """</td>
+    </tr>"""
+
+def terminology_html(con, path, colors):
+
+    cur1 = con.cursor()
+    cur1.execute("""SELECT id, variant, c, f
+                    FROM   term_output
+                    ORDER BY c DESC, id ASC, f DESC;""")
+
+    with open(path, "w", encoding="utf8") as file:
+
+        # --- start an HTML document
+        file.write(header("Terminology", "td, th {border: 1px solid #999; padding: 0.5rem;}"))
+        file.write("""
+<h1>Terminology</h1>
+<br><br>
+<table>
+    <tr>
+        <th>Term ID</th>
+        <th>Termhood</th>
+        <th>Term variant</th>
+        <th>Term variant frequency</th>
+    </tr>""")
+
+        # --- one term at a time: the first row spans all variants of the term
+        for id, rows in groupby(cur1, key=lambda row: row[0]):
+            rows = list(rows)
+            color = colors[str(id)]
+            file.write(firstrow(len(rows), color, id, rows[0][2], rows[0][1], rows[0][3]))
+            for row in rows[1:]: file.write(nextrow(color, row[1], row[3]))
+
+        # --- end the HTML document
+        file.write("\n</table>\n</html>")
@@ -0,0 +1,46 @@
+# --- FlexiTerm: term labels
+
+# --- term occurrences found in a document may be nested in or overlap with
+#     one another; labels are sorted by their position in the document and
+#     resolved in a single pass per step rather than by comparing every pair
+
+from itertools import groupby
+
+
+# --- indices of labels (start, offset, label) that are nested in a longer label
+#     NOTE: labels that cover the same text are kept
+def nested(labels, positions):
+    removed = set()
+    end = -1 # --- the furthest end of labels that start earlier
+    for start, group in groupby(positions, key=lambda i: labels[i][0]):
+        group = list(group)
+        longest = labels[group[0]][0] + labels[group[0]][1] # --- the longest label that starts here
+        for i in group:
+            if end >= labels[i][0] + labels[i][1] or longest > labels[i][0] + labels[i][1]: removed.add(i)
+        end = max(end, longest)
+    return removed
+
+
+# --- indices of labels that overlap with a label that starts earlier
+#     NOTE: touching labels count as overlapping, e.g. "IL" and "-2" in "IL-2"
+def overlapping(labels, positions):
+    removed = set()
+    end = -1
+    for start, group in groupby(positions, key=lambda i: labels[i][0]):
+        group = list(group)
+        if end >= start: removed.update(group)
+        end = max(end, labels[group[0]][0] + labels[group[0]][1])
+    return removed
+
+
+# --- labels left after removing nested labels and then overlapping ones, in the original order
+def resolve(labels):
+
+    # --- sort by start, longest first
+    positions = sorted(range(len(labels)), key=lambda i: (labels[i][0], -labels[i][1]))
+
+    removed = nested(labels, positions)
+    positions = [i for i in positions if i not in removed]
+    removed.update(overlapping(labels, positions))
+
+    return [labels[i] for i in range(len(labels)) if i not in removed]
@@ -0,0 +1,177 @@
+# --- FlexiTerm: term occurrences
+
+# --- terms are looked up in documents with a phrase matcher; in parallel mode
+#     the term patterns are sent to each worker process once and documents are
+#     sent in shards, so that the results can be merged in the original order
+
+import os
+import spacy
+from multiprocessing import Pool
+from spacy.matcher import PhraseMatcher
+from spacy.tokens import DocBin
+
+
+# --- number of documents sent to a worker process at a time
+shard_size = 100
+
+# --- number of term variants tokenised at a time
+batch_size = 1000
+
+# --- short words that are only labelled when uppercased
+common = ['all', 
+          'on', 
+          'in', 
+          'at', 
+          'to', 
+          'by', 
+          'of', 
+          'off', 
+          'so', 
+          'or', 
+          'as', 
+          'and', 
+          'ie',
+          'eg',
+          'dr',
+          'mr',
+          'mrs',
+          'ms',
+          'km',
+          'mm',
+          'old',
+          'no', 
+          'not', 
+          'pre',
+          'be', 
+          'is', 
+          'are', 
+          'am', 
+          'can', 
+          'for', 
+          'up',
+          'has',
+          'had',
+          'who']
+
+
+
+# --- model used to tokenise term variants
+def model(nlp):
+    return nlp.meta["lang"] + "_" + nlp.meta["name"] + " " + nlp.meta["version"]
+
+
+# --- term patterns previously saved to a file, if any: variant -> pattern
+# --- NOTE: only the patterns tokenised by the given model, or by any model if none is given
+def saved(path, vocab, key=None):
+    patterns = {}
+    if path != None and os.path.exists(path):
+        for pattern in DocBin(store_user_data=True).from_disk(path).get_docs(vocab):
+            if key == None or pattern.user_data.get("model") == key: patterns[pattern.user_data["variant"]] = pattern
+    return patterns
+
+
+# --- term patterns for term variants, reusing the saved patterns (see saved)
+# --- NOTE: only tokens are matched (attr="LOWER"), so the rest of the pipeline is not needed
+def tokenise(nlp, variants, saved={}):
+    saved = dict(saved)
+    new = [variant for variant in dict.fromkeys(variants) if variant not in saved]
+    for variant, pattern in zip(new, nlp.tokenizer.pipe(new, batch_size=batch_size)): saved[variant] = pattern
+    return [saved[variant] for variant in variants], len(variants) - len(new)
+
+
+# --- save term patterns so that they can be loaded again later
+# --- NOTE: the model is named once, because nlp.meta looks up installed packages every time
+def save(path, nlp, variants, patterns):
+    key = model(nlp)
+    binary = DocBin(attrs=["ORTH"], store_user_data=True)
+    for variant, pattern in zip(variants, patterns):
+        pattern.user_data["variant"] = variant
+        pattern.user_data.setdefault("model", key) # --- reused patterns keep their model
+        binary.add(pattern)
+    binary.to_disk(path)
+
+
+# --- phrase matcher for term patterns: keys (e.g. term variants) -> docs
+def compile(vocab, keys, patterns):
+    matcher = PhraseMatcher(vocab, attr="LOWER")
+    for key, pattern in zip(keys, patterns): matcher.add(key, None, pattern)
+    return matcher
+
+
+# --- term occurrences in a document: (start, offset, key)
+def find(matcher, doc):
+    found = []
+    for match_id, start, end in matcher(doc):
+        key = doc.vocab.strings[match_id]
+        span = doc[start:end].text
+        o = len(span)
+        s = len(doc[0:end].text) - o
+        if (span.lower() not in common) or span.upper() == span: # --- making sure that short acronyms such as OR are uppercased to avoid FPs
+            found.append((s, o, key))
+    return found
+
+
+# --- matchers for lookups: [(matcher, doc_ids)]
+def compile_lookups(vocab, lookups):
+    return [(compile(vocab, keys, patterns), only) for keys, patterns, only in lookups]
+
+# --- term occurrences in a document with the matcher of the first lookup that includes it
+def find_lookup(matchers, doc):
+    for matcher, only in matchers:
+        if only == None or doc.user_data["doc_id"] in only: return find(matcher, doc)
+    return []
+
+
+# --- matchers shared with worker processes
+matchers = None
+
+def init(lang, lookups):
+    global matchers
+    vocab = spacy.blank(lang).vocab
+    matchers = compile_lookups(vocab, [(keys, list(DocBin().from_bytes(patterns).get_docs(vocab)), only) for keys, patterns, only in lookups])
+
+def match(shard):
+    docs = DocBin(store_user_data=True).from_bytes(shard).get_docs(matchers[0][0].vocab)
+    return [(doc.user_data["doc_id"], find_lookup(matchers, doc)) for doc in docs]
+
+
+# --- documents included in any lookup
+def select(docs, vocab, lookups):
+    only = set()
+    for keys, patterns, ids in lookups:
+        if ids == None: return docs.get_docs(vocab)
+        only.update(ids)
+    return (doc for doc in docs.get_docs(vocab) if doc.user_data["doc_id"] in only)
+
+# --- serialised shards of documents
+def shards(docs):
+    shard = DocBin(attrs=["ORTH"], store_user_data=True)
+    for doc in docs:
+        shard.add(doc)
+        if len(shard) == shard_size:
+            yield shard.to_bytes()
+            shard = DocBin(attrs=["ORTH"], store_user_data=True)
+    if len(shard) > 0: yield shard.to_bytes()
+
+
+# --- term occurrences in documents: (doc_id, [(start, offset, key)]) in the order of documents
+# --- lookups: [(keys, patterns, doc_ids)], i.e. the patterns to look for in the given documents
+#     (all documents if none); a document is only looked up with the first lookup that includes it
+# --- NOTE: documents are read once, however many lookups there are
+def occurrences(docs, nlp, lookups, processes=1):
+
+    total = sum([len(docs) if only == None else len(only) for keys, patterns, only in lookups])
+
+    if processes > 1 and total > shard_size:
+        binaries = []
+        for keys, patterns, only in lookups:
+            binary = DocBin(attrs=["ORTH"])
+            for pattern in patterns: binary.add(pattern)
+            binaries.append((keys, binary.to_bytes(), only))
+        with Pool(processes, initializer=init, initargs=(nlp.lang, binaries)) as pool:
+            for result in pool.imap(match, shards(select(docs, nlp.vocab, lookups))):
+                yield from result
+    else:
+        matchers = compile_lookups(nlp.vocab, lookups)
+        for doc in select(docs, nlp.vocab, lookups): # --- reuse documents parsed when loading data
+            yield doc.user_data["doc_id"], find_lookup(matchers, doc)
@@ -0,0 +1,52 @@
+# --- FlexiTerm: nested MWTs
+
+# --- a term is nested in another term if its bag of words is a subset of the
+#     other bag of words; rather than comparing every pair of terms that share
+#     a token, subsets of each (short) bag of words are enumerated and looked
+#     up by hash, while long bags of words fall back to an inverted index
+
+from itertools import combinations
+
+
+# --- bags of words with more tokens than this are matched against the inverted index
+#     NOTE: 2^7 - 1 = 127 subsets
+max_subset = 7
+
+
+# --- nested pairs (parent, child) for bags of words: id -> tokens
+def nested_pairs(bags):
+
+    # --- ids that share the same set of tokens: set -> [id]
+    ids = {}
+    for id in sorted(bags): ids.setdefault(frozenset(bags[id]), []).append(id)
+
+    # --- inverted index: token -> sets of tokens that contain it
+    index = {}
+    for s in ids:
+        for token in s: index.setdefault(token, []).append(s)
+
+    pairs = []
+    for parent in ids:
+
+        # --- sets of tokens nested in the parent set, including the parent set itself
+        if len(parent) <= max_subset:
+            tokens = sorted(parent)
+            subsets = [frozenset(subset) for n in range(1, len(tokens)+1) for subset in combinations(tokens, n)]
+            subsets = [subset for subset in subsets if subset in ids]
+        else:
+            hits = {}
+            for token in parent:
+                for s in index[token]: hits[s] = hits.get(s, 0) + 1
+            subsets = [s for s in hits if hits[s] == len(s)]
+
+        for child in subsets:
+            for i in ids[parent]:
+                for j in ids[child]:
+                    # --- NOTE: of two terms with the same set of tokens, the
+                    #     one with a larger id is treated as the parent
+                    if child != parent or i > j: pairs.append((i, j))
+
+    # --- the order in which pairs of ids used to be compared
+    pairs.sort(key=lambda pair: (min(pair), max(pair)))
+
+    return pairs
@@ -0,0 +1,70 @@
+# --- FlexiTerm: persistent cache of parsed documents
+
+# --- the output of the loading stage (sentence & token rows + tokens of the parsed
+#     document) is stored under a hash of the text passed to spaCy and the model
+#     used to parse it, so that unchanged documents need not be parsed again
+
+import hashlib
+import json
+import sqlite3
+import spacy
+from spacy.tokens import DocBin
+
+
+# --- change whenever rows derived from a parse change (e.g. tag overrides, stemming)
+version = "1"
+
+# --- number of new entries to buffer before writing them to the cache
+buffer = 1000
+
+
+class ParseCache:
+
+    def __init__(self, path, nlp):
+        self.vocab = nlp.vocab
+        self.model = " ".join([version,
+                               spacy.__version__,
+                               nlp.meta["lang"] + "_" + nlp.meta["name"],
+                               nlp.meta["version"]])
+        self.con = sqlite3.connect(path)
+        self.con.execute("""CREATE TABLE IF NOT EXISTS parse
+                            (
+                              key        CHAR(64),
+                              sentences  TEXT,
+                              tokens     TEXT,
+                              doc        BLOB,
+                              PRIMARY KEY(key)
+                            );""")
+        self.new = []
+        self.hits = 0
+        self.misses = 0
+
+    # --- content address of a document
+    def key(self, text):
+        return hashlib.sha256((self.model + "\n" + text).encode("utf8")).hexdigest()
+
+    # --- retrieve (sentences, tokens, doc) or None if not cached
+    def get(self, key):
+        row = self.con.execute("SELECT sentences, tokens, doc FROM parse WHERE key = ?;", (key,)).fetchone()
+        if row == None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        doc = next(DocBin().from_bytes(row[2]).get_docs(self.vocab))
+        return json.loads(row[0]), json.loads(row[1]), doc
+
+    # --- store rows for a newly parsed document
+    def put(self, key, sentences, tokens, doc):
+        tokens_only = DocBin(attrs=["ORTH"])
+        tokens_only.add(doc)
+        self.new.append((key, json.dumps(sentences), json.dumps(tokens), tokens_only.to_bytes()))
+        if len(self.new) >= buffer: self.flush()
+
+    def flush(self):
+        self.con.executemany("INSERT OR REPLACE INTO parse(key, sentences, tokens, doc) VALUES(?,?,?,?);", self.new)
+        self.con.commit()
+        self.new.clear()
+
+    def close(self):
+        self.flush()
+        self.con.close()
@@ -0,0 +1,103 @@
+# --- FlexiTerm: performance report
+
+# --- wall time, CPU time and peak memory of each stage of the pipeline together
+#     with the number of rows it produced, exported as JSON so that runs can be
+#     compared to track regressions or to size hardware for a new corpus
+
+import json
+import platform
+import sys
+import time
+
+try:
+    import resource
+except ImportError: # --- not available on Windows
+    resource = None
+
+
+# --- CPU time of this process and of finished worker processes
+def cpu_time():
+    seconds = time.process_time()
+    if resource != None:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        seconds += children.ru_utime + children.ru_stime
+    return seconds
+
+
+# --- peak resident memory (MB) of this process and of the largest finished worker process
+# --- NOTE: the peak is measured since the start of the process, not the start of a stage
+def peak_memory():
+    if resource == None: return None, None
+    scale = 1024*1024 if sys.platform == "darwin" else 1024 # --- bytes on macOS, kilobytes on Linux
+    main = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return round(main, 1), round(children, 1)
+
+# --- reset the peak resident memory of this process (Linux only), so that the
+#     peak of a stage can be measured; False if it cannot be reset
+def reset_peak_memory():
+    try:
+        with open("/proc/self/clear_refs", "w") as file: file.write("5")
+        return True
+    except OSError:
+        return False
+
+# --- peak resident memory (MB) of this process since the last reset (Linux only)
+def stage_peak_memory():
+    try:
+        with open("/proc/self/status", "r") as file:
+            for line in file:
+                if line.startswith("VmHWM:"): return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+# --- wall and CPU time now, e.g. to time a stage from the start of the program
+def now():
+    return time.perf_counter(), cpu_time()
+
+
+class Performance:
+
+    # --- NOTE: the SQL profiler, if any, groups statements by the current stage
+    def __init__(self, profiler=None):
+        self.stages = []
+        self.name = None
+        self.profiler = profiler
+
+    # --- start timing a named stage, now or since the given time (see now)
+    def start(self, name, since=None):
+        self.name = name
+        if self.profiler != None: self.profiler.stage = name
+        (self.wall, self.cpu) = since if since != None else now()
+        # --- NOTE: the peak of a stage timed from the start of the program is the peak of the process
+        self.since_start = since != None
+        self.reset = not self.since_start and reset_peak_memory()
+
+    # --- stop timing the current stage and record the number of rows it produced
+    def stop(self, **rows):
+        wall = time.perf_counter() - self.wall
+        main, children = peak_memory()
+        stage = main if self.since_start else stage_peak_memory() if self.reset else None
+        self.stages.append({"stage"               : self.name,
+                            "wall"                : round(wall, 4),
+                            "cpu"                 : round(cpu_time() - self.cpu, 4),
+                            "peak_memory"         : stage,
+                            "peak_memory_process" : main,
+                            "peak_memory_workers" : children,
+                            "rows"                : rows})
+        return wall
+
+    # --- export the report as JSON
+    # --- startup: stages timed before the pipeline was run, e.g. imports and loading the model
+    def report(self, path, settings={}, startup=[]):
+        report = {"python"   : platform.python_version(),
+                  "platform" : platform.platform(),
+                  "settings" : settings,
+                  "startup"  : startup,
+                  "wall"     : round(sum([stage["wall"] for stage in self.stages]), 4),
+                  "cpu"      : round(sum([stage["cpu"] for stage in self.stages]), 4),
+                  "stages"   : self.stages}
+        with open(path, "w", encoding="utf8") as file:
+            json.dump(report, file, indent=4)
@@ -0,0 +1,1440 @@
+# --- FlexiTerm: the pipeline
+
+# --- the settings, the stoplist location and the spaCy model are loaded once
+#     when the pipeline is created, so that several corpora can be processed
+#     one after another (or in a long-running process) without reloading them;
+#     each run creates the database tables, reads the corpus and writes the
+#     results, stage by stage, e.g.
+#
+#     from pipeline import FlexiTerm
+#     flexiterm = FlexiTerm()
+#     flexiterm.run("./text")
+#     flexiterm.run("./other", {"acronyms": "implicit"})
+
+# --- NOTE: heavy modules (spacy, nltk, numpy, jellyfish) are imported by the
+#           stages that need them and the language model is loaded by the first
+#           stage that uses it, so that re-ranking or re-exporting previous
+#           results starts quickly and never loads the model
+
+import csv
+import itertools
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+from collections import deque
+from pathlib import Path
+from tagpattern import TagPattern
+from textnorm import pretagging, hyphen, prestem
+from nested import nested_pairs
+from labels import resolve
+import export
+from perf import Performance
+
+
+# --- language model from spacy and its language
+model_name = "en_core_web_sm"
+lang = "en"
+
+# --- stages of the pipeline in the order they are run; a run may also start
+#     from a later stage to reuse the results of the previous run, e.g.
+#     "calculate_termhood" to re-rank terms or "export_annotations" to export them again
+stages = ["load",
+          "extract_candidates",
+          "normalise_candidates",
+          "extract_acronyms",
+          "integrate_acronyms",
+          "renormalise_candidates",
+          "normalise_tokens",
+          "calculate_termhood",
+          "find_occurrences",
+          "export_annotations",
+          "export_concordances",
+          "export_terminology"]
+
+
+# --- default settings ---
+
+default = {
+   "pattern"  : "(((((NN|JJ) )*NN) IN (((NN|JJ) )*NN))|((NN|JJ )*NN POS (NN|JJ )*NN))|(((NN|JJ) )+NN( CD)?)",
+   "stoplist" : "./config/stoplist.txt",
+   "Smin"     : 0.962,
+   "Amin"     : 5,
+   "Fmin"     : 2,
+   "Cmin"     : 1,
+   "acronyms" : "explicit",
+   "batch_size" : 1000,
+   "processes"  : 1,
+   "fast_ingest": False,
+   "cache"      : "",
+   "page_size"  : 0,
+   "annotations": "json"
+}
+
+# --- number of rows inserted in bulk
+buffer = 10000
+
+# --- output files of the previous run
+outputs = ["annotations.json",
+           "annotations.jsonl",
+           "performance.json",
+           "sql_profile.json",
+           "concordances.html",
+           "corpus.html",
+           "terminology.html",
+           "terminology.csv"]
+
+
+
+
+
+# --- load settings ---
+
+def load_settings(settings_file):
+    try:
+        with open(Path(settings_file),"r") as file:
+            return json.load(file)
+    except:
+        print("WARNING: Settings file " + settings_file + " not found. Using the default values instead.\n")
+        return {}
+
+# --- valid settings: invalid or missing values are replaced by the default ones
+def validate(settings):
+
+    valid = dict(default)
+    for name in default:
+        if name in settings: valid[name] = settings[name]
+
+    try: re.compile(valid["pattern"])
+    except re.error:
+        print("WARNING: Invalid POS pattern: " + valid["pattern"])
+        print("         Using the default instead.\n")
+        valid["pattern"] = default["pattern"]
+
+    if not os.path.isfile(valid["stoplist"]):
+        print("WARNING: Stoplist file " + valid["stoplist"] + " not found.")
+        print("         Using the default instead.\n")
+        valid["stoplist"] = default["stoplist"]
+
+    if not (0 < valid["Smin"] and valid["Smin"] < 1):
+        print("WARNING: Invalid token similarity threshold:", valid["Smin"]);
+        print("         Using the default instead.\n")
+        valid["Smin"] = default["Smin"]
+
+    if type(valid["Amin"]) != int:
+        print("WARNING: Invalid acronym frequency threshold:", valid["Amin"]);
+        print("         Using the default instead.\n")
+        valid["Amin"] = default["Amin"]
+
+    if type(valid["Fmin"]) != int:
+        print("WARNING: Invalid term frequency threshold:", valid["Fmin"]);
+        print("         Using the default instead.\n")
+        valid["Fmin"] = default["Fmin"]
+
+    if valid["Cmin"] < 0.7:
+        print("WARNING: Invalid token C-value threshold:", valid["Cmin"]);
+        print("         Using the default instead.\n")
+        valid["Cmin"] = default["Cmin"]
+
+    if valid["acronyms"] not in ["explicit", "implicit"]:
+        print("WARNING: Invalid acronyms value:", valid["acronyms"]);
+        print("         Using the default instead.\n")
+        valid["acronyms"] = default["acronyms"]
+
+    if type(valid["batch_size"]) != int or valid["batch_size"] < 1:
+        print("WARNING: Invalid batch size:", valid["batch_size"]);
+        print("         Using the default instead.\n")
+        valid["batch_size"] = default["batch_size"]
+
+    if type(valid["processes"]) != int or valid["processes"] < 1:
+        print("WARNING: Invalid number of processes:", valid["processes"]);
+        print("         Using the default instead.\n")
+        valid["processes"] = default["processes"]
+
+    if type(valid["fast_ingest"]) != bool:
+        print("WARNING: Invalid fast ingest value:", valid["fast_ingest"]);
+        print("         Using the default instead.\n")
+        valid["fast_ingest"] = default["fast_ingest"]
+
+    if type(valid["cache"]) != str:
+        print("WARNING: Invalid parse cache location:", valid["cache"]);
+        print("         Using the default instead.\n")
+        valid["cache"] = default["cache"]
+
+    if type(valid["page_size"]) != int or valid["page_size"] < 0:
+        print("WARNING: Invalid page size:", valid["page_size"]);
+        print("         Using the default instead.\n")
+        valid["page_size"] = default["page_size"]
+
+    if valid["annotations"] not in ["json", "jsonl"]:
+        print("WARNING: Invalid annotations format:", valid["annotations"]);
+        print("         Using the default instead.\n")
+        valid["annotations"] = default["annotations"]
+
+    return valid
+
+def print_settings(settings):
+    print("--- Settings ---")
+    print("* pattern  :", settings["pattern"])
+    print("* stoplist :", settings["stoplist"])
+    print("* Smin     :", settings["Smin"])
+    print("* Amin     :", settings["Amin"])
+    print("* Fmin     :", settings["Fmin"])
+    print("* Cmin     :", settings["Cmin"])
+    print("* acronyms :", settings["acronyms"])
+    print("* batch_size :", settings["batch_size"])
+    print("* processes  :", settings["processes"])
+    print("* fast_ingest:", settings["fast_ingest"])
+    print("* cache      :", settings["cache"])
+    print("* page_size  :", settings["page_size"])
+    print("* annotations:", settings["annotations"])
+    print("----------------")
+
+
+
+
+
+# --- generalise tags to simplify patterns (regex) specified in the settings
+
+def gtag(tag):
+
+    if (len(tag) <= 1):         tag = "PUN"
+    elif (tag == "PRP$"):       tag = "PRP"
+    elif (tag == "WP$"):        tag = "WP"
+    elif (tag.find("JJ") == 0): tag = "JJ"
+    elif (tag.find("NN") == 0): tag = "NN";
+    elif (tag.find("RB") == 0): tag = "RB";
+    elif (tag.find("VB") == 0): tag = "VB";
+
+    return tag
+
+# --- documents parsed by spacy are kept next to the database, named after its file
+#     (e.g. flexiterm.sqlite.spacy), so that run.sqlite and run.db do not share them
+# --- NOTE: none for an in-memory database, which is discarded at the end of the run
+def docs_file(database):
+    return Path(str(database) + ".spacy") if database != ":memory:" else None
+
+# --- whether a database holds the results of a previous run, with the parsed documents next to it
+def previous_results(database):
+
+    if database == ":memory:" or not os.path.isfile(database) or not docs_file(database).exists(): return False
+
+    con = sqlite3.connect(database)
+    try:
+        cur1 = con.cursor()
+        cur1.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN ('term_normalised', 'term_occurrence');")
+        if cur1.fetchone()[0] < 2: return False # --- e.g. a database of an older version
+        cur1.execute("SELECT COUNT(*) FROM term_normalised;")
+        return cur1.fetchone()[0] > 0
+    except sqlite3.DatabaseError: # --- not an sqlite database
+        return False
+    finally:
+        con.close()
+
+# --- color scaling
+def transition(value, maximum, start_point, end_point):
+    return start_point + (end_point - start_point)*value/maximum
+
+def transition3(value, maximum):
+    r1= transition(value, maximum, 37, 211)
+    r2= transition(value, maximum, 150, 234)
+    r3= transition(value, maximum, 190, 242)
+    return "#%02x%02x%02x" % (int(r1), int(r2), int(r3))
+
+# --- random color picking
+def color_generator(number_of_colors):
+    color = ["#"+''.join([random.choice('9ABCDEF') for j in range(6)]) for i in range(number_of_colors)]
+    return color
+
+
+
+
+
+class FlexiTerm:
+
+    # --- load the settings and the database schema
+    # --- started: perf.now() when the program started, so that the start-up time includes the imports
+    def __init__(self, settings_file="./config/settings.json", schema="./config/schema.sql", reset="./config/reset.sql", started=None):
+
+        self.startup = Performance()
+        self.startup.start("startup", started)
+
+        self.settings = validate(load_settings(settings_file))
+
+        try:
+            with open(Path(schema),'r') as file:
+                self.sql_script = file.read()
+                print(self.sql_script[0:100] + '...') # --- preview schema
+        except OSError:
+            raise FileNotFoundError("Schema file " + schema + " not found. Unable to create the tables.")
+
+        try:
+            with open(Path(reset),'r') as file:
+                self.reset_script = file.read()
+        except OSError:
+            raise FileNotFoundError("Reset file " + reset + " not found. Unable to delete previous data.")
+
+        self.nlp = None
+
+        # --- stoplists and compiled term formation patterns, kept for the next runs
+        self.stoplists = {}
+        self.tagpatterns = {}
+
+        run_time = self.startup.stop()
+
+        print(f"Started in {run_time:0.4f} seconds")
+
+    # --- the language model from spacy, loaded when a stage needs it for the first time
+    def model(self):
+
+        if self.nlp == None:
+
+            self.startup.start("model")
+
+            import spacy
+            self.nlp = spacy.load(model_name)
+            self.nlp.add_pipe('sentencizer')
+
+            run_time = self.startup.stop()
+
+            print(f"Language model loaded in {run_time:0.4f} seconds")
+
+        return self.nlp
+
+    # --- process a corpus: documents in the corpus folder, results in the output folder
+    # --- settings override the ones loaded when the pipeline was created,
+    #     e.g. {"acronyms": "implicit", "processes": 4}
+    # --- start: the first stage to run (see stages), the previous ones are taken from the database
+    # --- database: an sqlite file, or ":memory:" for a database that is discarded at the end of the run
+    def run(self, corpus="./text", settings=None, database="flexiterm.sqlite", output="./out", incremental=False, profiler=None, start="load"):
+
+        self.config = self.settings if settings == None else validate({**self.settings, **settings})
+        self.corpus = corpus
+        self.output = Path(output)
+        self.incremental = incremental
+        self.profiler = profiler
+
+        print_settings(self.config)
+
+        # --- check the input before anything else is loaded
+        if start == "load" and not incremental:
+            if not os.path.isdir(corpus) or not any([os.path.isfile(os.path.join(corpus, name)) for name in os.listdir(corpus)]):
+                raise ValueError('No input data found. Check the text folder.')
+
+        # --- NOTE: checked before connecting, which would create an empty database
+        if start != "load" and not previous_results(database):
+            raise ValueError('No previous results found in ' + database + '. Run FlexiTerm on a corpus first.')
+
+        # --- NOTE: the schema deletes the results of the previous run
+        self.connect(database, start == "load")
+
+        if start == "load": self.load_stoplist()
+
+        self.clear_output()
+
+        # --- state passed between stages, restored from the database if needed
+        self.bags = None
+        self.docs = None
+        self.n = None
+        self.colors = None
+
+        self.perf = Performance(profiler)
+
+        for stage in stages[stages.index(start):]: getattr(self, stage)()
+
+        self.close()
+
+        return self.perf.stages
+
+    # --- database connection ---
+    def connect(self, database, create=True):
+
+        self.con = sqlite3.connect(database) if self.profiler == None else self.profiler.connect(database)
+
+        # --- parsed documents are kept next to the database so that they can be reused
+        self.docs_file = docs_file(database)
+
+        # --- term patterns are kept next to the results so that they can be reused
+        self.patterns_file = self.output / "patterns.spacy"
+
+        # --- create database tables
+        if create:
+            cur1 = self.con.cursor()
+            cur1.executescript(self.sql_script)
+            if not self.incremental: cur1.executescript(self.reset_script)
+            self.con.commit()
+
+    # --- load stoplist ---
+    def load_stoplist(self):
+
+        stoplist = self.config["stoplist"]
+
+        print("Loading stoplist from " + stoplist + "...");
+
+        if stoplist not in self.stoplists:
+            with open(Path(stoplist), 'r') as file: self.stoplists[stoplist] = file.read()
+
+        try:
+            # --- read the stoplist as a CSV file
+            rows = csv.reader(self.stoplists[stoplist].splitlines())
+
+            # --- insert rows from the CSV file
+            self.con.executemany("INSERT INTO stopword (word) VALUES (?);", rows)
+            self.con.commit()
+
+        except sqlite3.Error as error: print(error)
+
+        self.stopwords = self.stoplists[stoplist].split('\n')
+
+    # --- delete previous output files if any
+    def clear_output(self):
+
+        os.makedirs(self.output, exist_ok=True)
+
+        for name in outputs:
+            file_path = self.output / name
+            if os.path.exists(file_path): os.remove(file_path)
+
+        # --- pages of the annotated corpus
+        for file_path in self.output.glob("corpus_*.html"): os.remove(file_path)
+
+    # --- export the reports and close the database
+    def close(self):
+
+        # --- export the SQL profile
+        if self.profiler != None: self.profiler.report(self.con, self.output / "sql_profile.json")
+
+        self.con.close()
+
+        # --- export the performance report
+        self.perf.report(self.output / "performance.json", {name: self.config[name] for name in default if name != "stoplist"}, self.startup.stages)
+
+        for stage in self.startup.stages + self.perf.stages: print(f"{stage['stage']:<25} {stage['wall']:10.3f}")
+
+    # --- bags of words stored by the previous run: rowid -> tokens
+    def stored_bags(self):
+        bags = {}
+        for id, token in self.con.execute("SELECT id, token FROM term_bag ORDER BY rowid;"): bags.setdefault(id, []).append(token)
+        return bags
+
+    # --- number of rows in a table (for the performance report)
+    def count(self, table, rows="*"):
+        return self.con.execute("SELECT COUNT(" + rows + ") FROM " + table + ";").fetchone()[0]
+
+    # --- load & preprocess input documents
+    def load(self):
+
+        from nltk.stem.porter import PorterStemmer
+        from spacy.tokens import DocBin
+
+        con = self.con
+        cur1 = con.cursor()
+        nlp = self.model()
+        incremental = self.incremental
+        docs_file = self.docs_file
+        batch_size = self.config["batch_size"]
+        processes = self.config["processes"]
+        cache_file = self.config["cache"]
+
+        self.perf.start("load")
+
+        #####
+        if not incremental:
+            cur1.execute("DELETE FROM data_document;")
+            cur1.execute("DELETE FROM data_sentence;")
+            cur1.execute("DELETE FROM data_token;")
+            cur1.execute("DELETE FROM term_candidate;")
+            cur1.execute("DELETE FROM term_definition;")
+            cur1.execute("DELETE FROM term_occurrence;")
+            cur1.execute("DELETE FROM term_occurrence_variant;")
+            cur1.execute("DELETE FROM term_occurrence_document;")
+        con.commit()
+        #####
+
+        # --- fast ingest mode: trade durability for speed while loading data,
+        #     i.e. no rollback journal, no syncing to disk, larger page cache
+        #     and temporary tables/indices kept in memory
+        pragmas = {"journal_mode" : "OFF",
+                   "synchronous"  : "OFF",
+                   "cache_size"   : -262144, # --- in KiB, i.e. 256 MB
+                   "temp_store"   : "MEMORY"}
+
+        restore = {}
+        if self.config["fast_ingest"]:
+            for name in pragmas:
+                cur1.execute("PRAGMA " + name + ";")
+                restore[name] = cur1.fetchone()[0]
+                cur1.execute("PRAGMA " + name + " = " + str(pragmas[name]) + ";")
+
+        # --- buffer rows and insert them in bulk
+        rows = {"document" : [], "sentence" : [], "token" : []}
+
+        def flush(rows):
+            cur1.executemany("INSERT INTO data_document(id, document, verbatim) VALUES(?, ?, ?);", rows["document"])
+            cur1.executemany("INSERT INTO data_sentence(id, doc_id, position, sentence, tagged_sentence, tags) VALUES(?, ?, ?, ?, ?, ?)", rows["sentence"])
+            cur1.executemany("INSERT INTO data_token(sentence_id, position, token, stem, lemma, gtag) VALUES(?, ?, ?, ?, ?, ?)", rows["token"])
+            for table in rows: rows[table].clear()
+
+        stemmer = PorterStemmer()
+
+        # --- turn a parsed document into sentence and token rows
+        #     NOTE: sentence IDs are added when the rows are stored,
+        #           so that the same rows can be cached for any document ID
+        def parse(doc):
+            sentences = []
+            tokens = []
+
+            # --- split sentences
+            s = 0
+            for sent in doc.sents: # --- store sentences
+                s+=1
+                sentence = sent.text
+                for token in sent:
+                    token.tag_ = gtag(token.tag_) # --- generalise tag, e.g. JJR --> JJ
+                    # --- prevent tagging of symbols and abbreviations as NNs
+                    if token.text == '%': token.tag_ = 'SYM'
+                    elif token.text.lower() in ('et', 'al', 'etc'): token.tag_ = 'XX'
+                    elif token.text.lower() in ('related', 'based'): token.tag_ = 'JJ'
+                tags = " ".join([token.tag_ for token in sent])
+                tagged_sentence = " ".join([token.text+"/"+token.tag_ for token in sent])
+                sentences.append((s, sentence, tagged_sentence, tags))
+
+                # --- tokenise sentences
+                p = 0
+                for token in sent: # --- store tokens
+                    p+=1
+                    lemma = token.lemma_.lower()    # --- lemmatise
+                    lemma = prestem(lemma)          # --- prepare lemma for stemming
+                    stem = stemmer.stem(lemma)      # --- stem lemma
+                    tokens.append((s, p, token.text, stem, lemma, token.tag_))
+
+            return sentences, tokens
+
+        def store(doc_id, content, verbatim, sentences, tokens, doc):
+            rows["document"].append((doc_id, content, verbatim))
+            for (s, sentence, tagged_sentence, tags) in sentences:
+                rows["sentence"].append((doc_id+"."+str(s), doc_id, s, sentence, tagged_sentence, tags))
+            for (s, p, token, stem, lemma, tag) in tokens:
+                rows["token"].append((doc_id+"."+str(s), p, token, stem, lemma, tag))
+
+            if len(rows["token"]) >= buffer: flush(rows)
+
+            doc.user_data["doc_id"] = doc_id
+            docs.add(doc)
+
+        # --- previously parsed documents
+        cache = None
+        if cache_file != "":
+            print("Using parse cache " + cache_file + "...")
+            from parsecache import ParseCache
+            cache = ParseCache(cache_file, nlp)
+
+        # --- documents in the order they were read, waiting to be stored
+        queue = deque()
+
+        # --- read documents from the "text" folder
+        folder = self.corpus
+
+        # --- incremental mode: keep documents loaded previously unless removed or modified
+        unchanged = set()
+        if incremental:
+            cur1.execute("SELECT id FROM data_document;")
+            stored = set([row1[0] for row1 in cur1.fetchall()])
+            for doc_id in os.listdir(folder):
+                file_path = os.path.join(folder, doc_id)
+                if doc_id in stored and os.path.isfile(file_path):
+                    file = open(file_path, "r", encoding="utf8")
+                    verbatim = file.read()
+                    file.close()
+                    cur1.execute("SELECT verbatim FROM data_document WHERE id = ?;", (doc_id,))
+                    if cur1.fetchone()[0] == verbatim: unchanged.add(doc_id)
+
+            outdated = stored - unchanged
+            print(str(len(unchanged)) + " unchanged document(s), " + str(len(outdated)) + " removed or modified")
+
+            # --- delete removed or modified documents (schema.sql drops the indices)
+            cur1.execute("CREATE INDEX IF NOT EXISTS idx02 ON data_token(sentence_id, position);")
+            cur1.execute("CREATE INDEX IF NOT EXISTS idx18 ON term_candidate(sentence_id);")
+            cur1.execute("CREATE INDEX IF NOT EXISTS idx19 ON term_definition(sentence_id);")
+            cur1.execute("CREATE INDEX IF NOT EXISTS idx20 ON term_occurrence(doc_id);")
+            cur1.execute("SELECT id, doc_id FROM data_sentence;")
+            sentence_ids = [(row1[0],) for row1 in cur1.fetchall() if row1[1] in outdated]
+            cur1.executemany("DELETE FROM term_candidate WHERE sentence_id = ?;", sentence_ids)
+            cur1.executemany("DELETE FROM term_definition WHERE sentence_id = ?;", sentence_ids)
+            cur1.executemany("DELETE FROM term_occurrence WHERE doc_id = ?;", [(doc_id,) for doc_id in outdated])
+            cur1.executemany("DELETE FROM term_occurrence_document WHERE doc_id = ?;", [(doc_id,) for doc_id in outdated])
+            cur1.executemany("DELETE FROM data_token WHERE sentence_id = ?;", sentence_ids)
+            cur1.executemany("DELETE FROM data_sentence WHERE id = ?;", sentence_ids)
+            cur1.executemany("DELETE FROM data_document WHERE id = ?;", [(doc_id,) for doc_id in outdated])
+            con.commit()
+
+        # --- sentences loaded from now on are new
+        cur1.execute("SELECT MAX(rowid) FROM data_sentence;")
+        loaded = cur1.fetchone()[0]
+        if loaded == None: loaded = 0
+
+        def documents(folder):
+            for doc_id in os.listdir(folder):
+                file_path = os.path.join(folder, doc_id)
+                if os.path.isfile(file_path) and doc_id not in unchanged:
+                    file = open(file_path, "r", encoding="utf8")
+                    verbatim = file.read()
+                    file.close()
+                    content = pretagging(verbatim)
+                    text = hyphen(content)
+
+                    key = None
+                    cached = None
+                    if cache != None:
+                        key = cache.key(text)
+                        cached = cache.get(key)
+                    queue.append((doc_id, content, verbatim, key, cached))
+
+                    if cached == None: yield text # --- parse only if not cached
+
+        # --- store cached documents at the front of the queue
+        def dequeue():
+            n = 0
+            while queue and queue[0][4] != None:
+                (doc_id, content, verbatim, key, cached) = queue.popleft()
+                store(doc_id, content, verbatim, *cached)
+                n += 1
+                print('.', end='')
+            return n
+
+        print("Loading data from " + folder + "...");
+        n = 0
+
+        # --- keep parsed documents (tokens only) for term lookup later on
+        docs = DocBin(attrs=["ORTH"], store_user_data=True)
+
+        if incremental:
+            found = set()
+            if docs_file != None and docs_file.exists():
+                for doc in DocBin(store_user_data=True).from_disk(docs_file).get_docs(nlp.vocab):
+                    if doc.user_data["doc_id"] in unchanged:
+                        docs.add(doc)
+                        found.add(doc.user_data["doc_id"])
+
+            # --- tokenise documents previously parsed but no longer available
+            for doc_id in unchanged - found:
+                cur1.execute("SELECT document FROM data_document WHERE id = ?;", (doc_id,))
+                doc = nlp.make_doc(hyphen(cur1.fetchone()[0]))
+                doc.user_data["doc_id"] = doc_id
+                docs.add(doc)
+
+        # --- parse documents in batches, optionally spread over several processes
+        for doc in nlp.pipe(documents(folder), batch_size=batch_size, n_process=processes):
+            n += dequeue()
+            (doc_id, content, verbatim, key, cached) = queue.popleft() # --- the document just parsed
+            sentences, tokens = parse(doc)
+            if cache != None: cache.put(key, sentences, tokens, doc)
+            store(doc_id, content, verbatim, sentences, tokens, doc)
+            n += 1
+            print('.', end='')
+
+        n += dequeue()
+
+        if cache != None:
+            print("\nParse cache: " + str(cache.hits) + " hit(s), " + str(cache.misses) + " miss(es)", end='')
+            cache.close()
+
+        flush(rows)
+
+        cur1.execute("SELECT COUNT(*) FROM data_document;")
+        if cur1.fetchone()[0] == 0:
+            con.close()
+            raise ValueError('No input data found. Check the text folder.')
+
+        con.commit()
+        if docs_file != None: docs.to_disk(docs_file)
+
+        self.loaded = loaded
+        self.docs = docs
+
+        print('\nData loaded.')
+
+        cur1.execute("CREATE INDEX IF NOT EXISTS idx01 ON data_document(id);")
+        cur1.execute("CREATE INDEX IF NOT EXISTS idx02 ON data_token(sentence_id, position);")
+        con.commit()
+
+        # --- back to the default database settings
+        for name in restore:
+            cur1.execute("PRAGMA " + name + " = " + str(restore[name]) + ";")
+
+        run_time = self.perf.stop(documents=self.count("data_document"), sentences=self.count("data_sentence"), tokens=self.count("data_token"))
+
+        print(f"Data loaded in {run_time:0.4f} seconds")
+
+    # --- extract term candidates
+    def extract_candidates(self):
+
+        con = self.con
+        cur1 = con.cursor()
+        cur2 = con.cursor()
+
+        self.perf.start("extract candidates")
+
+        # --- extract NPs of a predefined structure (the pattern in the settings)
+
+        #####
+        cur1.execute("DELETE FROM term_phrase;")
+        #####
+
+        print("Extracting term candidates...");
+
+        pattern = self.config["pattern"]
+        if pattern not in self.tagpatterns: self.tagpatterns[pattern] = TagPattern(pattern)
+        regex = self.tagpatterns[pattern]
+
+        # --- stopwords: tokens are looked up in the stoplist file, stems in the stopword table
+        stopwords = set(self.stopwords)
+        cur1.execute("SELECT word FROM stopword;")
+        stopstems = set([row1[0] for row1 in cur1.fetchall()])
+
+        # --- sentences loaded before this rowid already have their candidates stored
+        loaded = self.loaded
+
+        # --- NOTE: stored candidates extracted with another pattern or stoplist are extracted again
+        used = {"pattern": pattern, "stoplist": self.stoplists[self.config["stoplist"]]}
+        cur1.execute("SELECT name, value FROM term_candidate_setting;")
+        if loaded > 0 and dict(cur1.fetchall()) != used:
+            print("The pattern or the stoplist has changed. Extracting term candidates from all sentences...")
+            cur1.execute("DELETE FROM term_candidate;")
+            loaded = 0
+
+        # --- buffer candidates and insert them in bulk
+        candidates = []
+
+        def insert_candidates(candidates):
+            cur2.executemany("""INSERT INTO term_candidate(id, sentence_id, token_start, token_length, phrase, normalised)
+                                VALUES (?,?,?,?,?,?);""", candidates)
+            candidates.clear()
+
+        # --- NOTE: only newly loaded sentences, candidates from the other ones are already stored
+        cur1.execute("SELECT COUNT(*) FROM data_sentence WHERE length(sentence) > 30 AND rowid > ?;", (loaded,))
+        total = cur1.fetchone()[0]
+
+        # --- POS tags, tokens and stems of all sentences in a single pass
+        cur1.execute("""SELECT S.id, S.tags, T.token, T.stem
+                        FROM   data_sentence S, data_token T
+                        WHERE  length(S.sentence) > 30
+                        AND    S.rowid > ?
+                        AND    T.sentence_id = S.id
+                        ORDER BY S.rowid, T.position;""", (loaded,))
+        n = 0
+        for (sentence_id, tags), rows1 in itertools.groupby(cur1, key=lambda row1: (row1[0], row1[1])):
+
+            # --- progress bar
+            n += 1
+            sys.stdout.write('\r')
+            p = int(100*n/total)
+            sys.stdout.write("[%-100s] %d%%" % ('='*p, p))
+            sys.stdout.flush()
+
+            # --- tokens & stems in the order of their positions in the sentence
+            words = []
+            stems = []
+            for row1 in rows1:
+                words.append(row1[2])
+                stems.append(row1[3])
+
+            # --- match patterns
+            for (start, length) in regex.finditer(tags):
+
+                # --- extract the corresponding tokens
+                tokens = words[start-1:start-1+length]
+
+                # --- trim leading stopwords
+                i = 0
+                while length > 1:
+                    if tokens[i].lower() in stopwords:
+                        start += 1
+                        length -= 1
+                        i+=1
+                    else: break
+
+                tokens = tokens[i:]
+
+                # --- trim trailing stopwords
+                i = len(tokens) - 1
+                while length > 1:
+                    if tokens[i].lower() in stopwords:
+                        length -= 1
+                        i-=1
+                    else: break
+
+                tokens = tokens[:i+1]
+
+                # --- join tokens into a phrase
+                phrase = " ".join(tokens)
+                phrase_id = sentence_id+"."+str(start)
+
+                # --- if still multi-word phrase and not too long
+                if 1 < length and length < 8:
+
+                    # --- strip off possible . at the end
+                    if phrase.endswith('.'): phrase = phrase[:-1]
+
+                    # --- ignore phrases that contain web concepts: email address, URL, #hashtag
+                    if not(phrase.find("@")>=0 or
+                           phrase.find("#")>=0 or
+                           phrase.lower().find("http")>=0 or
+                           phrase.lower().find("www")>=0):
+                        # --- normalise phrase by stemming: distinct stems other than stopwords in alphabetical order
+                        normalised = " ".join(sorted(set(stems[start-1:start-1+length]) - stopstems))
+                        normalised = normalised.replace('.', '') # --- e.g. U.K., Dr., St. -> UK, Dr, St
+
+                        # --- store phrase as a MWT candidate
+                        candidates.append((phrase_id, sentence_id, start, length, phrase, normalised))
+
+            if len(candidates) >= buffer: insert_candidates(candidates)
+
+        insert_candidates(candidates)
+
+        cur1.execute("DELETE FROM term_candidate_setting;")
+        cur1.executemany("INSERT INTO term_candidate_setting(name, value) VALUES (?,?);", used.items())
+
+        cur1.execute("CREATE INDEX IF NOT EXISTS idx18 ON term_candidate(sentence_id);")
+
+        # --- candidates from all documents, to be normalised in the steps that follow
+        cur1.execute("""INSERT INTO term_phrase(id, sentence_id, token_start, token_length, phrase, normalised)
+                        SELECT id, sentence_id, token_start, token_length, phrase, normalised
+                        FROM   term_candidate
+                        ORDER BY rowid;""")
+        cur1.execute("UPDATE term_phrase SET flat = LOWER(REPLACE(phrase, ' ', ''));")
+        con.commit()
+
+        cur1.execute("CREATE INDEX idx03 ON term_phrase(flat);")
+        cur1.execute("CREATE INDEX idx04 ON term_phrase(LOWER(phrase));")
+
+        run_time = self.perf.stop(candidates=self.count("term_phrase"))
+
+        print(f"Term candidates extracted in {run_time:0.4f} seconds")
+
+    # --- normalise term candidates
+    def normalise_candidates(self):
+
+        con = self.con
+        cur1 = con.cursor()
+        cur2 = con.cursor()
+
+        self.perf.start("normalise candidates")
+
+        # --- re-normalise term candidates that have different TOKENISATION,
+        #     e.g. posterolateral corner B vs. postero lateral corner
+        # --- keep the one with MORE tokens (e.g. postero lateral corner)
+
+        cur1.execute("DELETE FROM tmp_normalised;")
+
+        cur1.execute("""INSERT INTO tmp_normalised(changeto, changefrom)
+                        SELECT P1.normalised, P2.normalised
+                        FROM   term_phrase P1, term_phrase P2
+                        WHERE  P1.flat = P2.flat
+                        AND    P1.token_length > P2.token_length
+                        AND    P1.normalised <> P2.normalised;""")
+
+        cur1.execute("""SELECT DISTINCT changefrom, changeto FROM tmp_normalised;""")
+        rows1 = cur1.fetchall()
+        for row1 in rows1:
+            changefrom = row1[0]
+            changeto   = row1[1]
+            print(changefrom, "-->", changeto)
+            cur2.execute("UPDATE term_phrase SET normalised = ? WHERE normalised = ?;", (changeto, changefrom))
+
+        con.commit()
+
+        run_time = self.perf.stop(candidates=self.count("term_phrase"))
+
+        print(f"Term candidates normalised in {run_time:0.4f} seconds")
+
+    # --- acronym recognition
+    def extract_acronyms(self):
+
+        from acronyms import explicit_definitions, explicit_acronyms, implicit_acronyms
+
+        self.perf.start("extract acronyms")
+
+        # --- NOTE: definitions are stored in both modes, so that a later incremental
+        #           run in the explicit mode only needs to look for them in new sentences
+        explicit_definitions(self.con, self.model(), self.loaded)
+
+        if self.config["acronyms"] == "explicit":
+            print("Extracting explicit acronyms...")
+            explicit_acronyms(self.con, self.model())
+        else:
+            print("Extracting implicit acronyms...")
+            implicit_acronyms(self.con, self.config["Amin"])
+
+        run_time = self.perf.stop(acronyms=self.count("term_acronym"))
+
+        print(f"Acronyms extracted in {run_time:0.4f} seconds")
+
+    # --- integrate acronyms
+    def integrate_acronyms(self):
+
+        import numpy as np
+
+        con = self.con
+        cur1 = con.cursor()
+        cur2 = con.cursor()
+
+        self.perf.start("integrate acronyms")
+
+        # --- expand definitions that contain other acronyms, e.g.
+        #     NIK = NF kappa B inducing kinase -> nuclear factor kappa B inducing kinase
+        cur1.execute("DELETE FROM tmp_normalised;")
+
+        cur1.execute("""SELECT DISTINCT LOWER(A.acronym), A.normalised, LOWER(P.phrase), P.normalised
+                        FROM   term_acronym A, term_acronym P
+                        WHERE  ' ' || P.phrase || ' ' LIKE '% ' || A.acronym || ' %';""")
+        rows1 = cur1.fetchall()
+        for row1 in rows1:
+            acronym = row1[0].split()
+            definition = row1[1].split()
+            phrase = row1[2]
+            normalised = row1[3].split()
+            normalised = np.setdiff1d(normalised, acronym)
+            normalised = np.union1d(normalised, definition)
+            renormalised = " ".join(np.sort(normalised))
+
+            cur2.execute("INSERT INTO tmp_normalised(changefrom, changeto) VALUES(?, ?);", (phrase, renormalised))
+
+        cur1.execute("SELECT changefrom, changeto FROM tmp_normalised;")
+        rows1 = cur1.fetchall()
+        for row1 in rows1:
+            phrase = row1[0]
+            normalised = row1[1]
+            cur2.execute("UPDATE term_acronym SET normalised = ? WHERE LOWER(phrase) = ?;", (normalised, phrase))
+
+        # --- treat acronyms that are NOT already NESTED within multi-word term candidates
+        #     as stand-alone MWT candidates
+        # --- insert mentions of such acronyms into the term_phrase table
+
+        cur1.execute("""INSERT INTO term_phrase(id, sentence_id, token_start, token_length, phrase, normalised)
+                        SELECT sentence_id || '.' || position, sentence_id, position, 1, acronym, normalised
+                        FROM   data_token T, term_acronym A
+                        WHERE  T.token = A.acronym
+                        AND    T.gtag != 'IN'
+                        EXCEPT
+                        SELECT T.sentence_id || '.' || T.position, T.sentence_id, T.position, 1, A.acronym, A.normalised
+                        FROM   data_token T, term_acronym A, term_phrase P
+                        WHERE  T.token = A.acronym
+                        AND    T.sentence_id = P.sentence_id
+                        AND    P.token_start <= T.position
+                        AND    T.position < P.token_start + P.token_length;""")
+
+        # --- now replace NESTED mentions of acronyms with their EXPANDED FORMS
+        cur1.execute("DELETE FROM tmp_normalised;")
+
+        cur1.execute("""SELECT DISTINCT LOWER(P.phrase), P.normalised
+                        FROM   term_acronym A, term_phrase P
+                        WHERE  P.normalised <> A.normalised
+                        AND    ' ' || P.phrase || ' ' LIKE '% ' || LOWER(A.acronym) || ' %';""")
+        rows1 = cur1.fetchall()
+        for row1 in rows1:
+            phrase = row1[0]
+            normalised = row1[1].split()
+            cur2.execute("""SELECT LOWER(acronym) AS acr, normalised
+                            FROM   term_acronym
+                            WHERE  ' ' || ? || ' ' LIKE '% ' || acr || ' %'
+                            ORDER BY LENGTH(acronym) DESC;""", (phrase,))
+            rows2 = cur2.fetchall()
+            for row2 in rows2:
+                acronym = row2[0].split()
+                definition = row2[1].split()
+                normalised = np.setdiff1d(normalised, acronym)
+                normalised = np.union1d(normalised, definition)
+
+            renormalised = " ".join(np.sort(normalised))
+
+            cur2.execute("INSERT INTO tmp_normalised(changefrom, changeto) VALUES(?, ?);", (phrase, renormalised))
+
+        cur1.execute("SELECT changefrom, changeto FROM tmp_normalised;")
+        rows1 = cur1.fetchall()
+        for row1 in rows1:
+            phrase = row1[0]
+            normalised = row1[1]
+            cur2.execute("UPDATE term_phrase SET normalised = ? WHERE LOWER(phrase) = ?;", (normalised, phrase))
+
+        # --- update multi-word acronyms, which were previously picked up as MWT candidates
+        cur1.execute("SELECT LOWER(acronym), normalised FROM term_acronym WHERE acronym LIKE '% %';")
+        rows1 = cur1.fetchall()
+        for row1 in rows1:
+            acronym = row1[0]
+            token_length = len(acronym.split())
+            normalised = row1[1]
+            cur2.execute("UPDATE term_phrase SET normalised = ? WHERE LOWER(phrase) = ?;", (normalised, acronym))
+
+        # --- add previously missed MWT candidates
+            extra = 0
+            cur2.execute("""SELECT COUNT(*)
+                            FROM   data_sentence
+                            WHERE  ' ' || sentence || ' ' LIKE '% '|| ? ||' %';""", (acronym,))
+            extra += cur2.fetchone()[0]
+
+            cur2.execute("""SELECT COUNT(*)
+                            FROM   term_phrase
+                            WHERE  ' ' || phrase || ' ' LIKE '% '|| ? ||' %';""", (acronym,))
+            extra -= cur2.fetchone()[0]
+
+            while extra > 0:
+                cur2.execute("""INSERT INTO term_phrase(id, sentence_id, token_start, token_length, phrase, normalised)
+                                VALUES(?,0,0,?,?,?);""", (acronym+'.'+str(extra),token_length,acronym,normalised))
+                extra -= 1
+
+        con.commit()
+
+        run_time = self.perf.stop(candidates=self.count("term_phrase"))
+
+        print(f"Acronyms integrated in {run_time:0.4f} seconds")
+
+    # --- normalise MWT candidates
+    def renormalise_candidates(self):
+
+        con = self.con
+        cur1 = con.cursor()
+        cur2 = con.cursor()
+
+        self.perf.start("re-normalise candidates")
+
+        cur1.execute("DELETE FROM tmp_normalised;")
+
+        cur1.execute("""INSERT INTO tmp_normalised(changefrom, changeto)
+                        SELECT DISTINCT P1.normalised, P2.normalised
+                        FROM   term_phrase P1, term_phrase P2
+                        WHERE  P1.flat LIKE '%-%'
+                        AND    REPLACE(LOWER(P1.phrase),'-',' ') = LOWER(P2.phrase);""")
+
+        cur1.execute("""SELECT DISTINCT changefrom, changeto FROM tmp_normalised;""")
+        rows1 = cur1.fetchall()
+        for row1 in rows1:
+            changefrom = row1[0]
+            changeto   = row1[1]
+            print(changefrom, "-->", changeto)
+            cur2.execute("UPDATE term_phrase SET normalised = ? WHERE normalised = ?;", (changeto, changefrom))
+
+        cur1.execute("DELETE FROM tmp_normalised;")
+
+        cur1.execute("""INSERT INTO tmp_normalised(changeto, changefrom)
+                        SELECT DISTINCT P1.normalised, P2.normalised
+                        FROM   term_phrase P1, term_phrase P2
+                        WHERE  P1.flat LIKE '%-%'
+                        AND    REPLACE(LOWER(P1.phrase),'-','') = LOWER(P2.phrase)
+                        AND    REPLACE(P1.normalised,'-','') = P2.normalised;""")
+
+        cur1.execute("""SELECT DISTINCT changefrom, changeto FROM tmp_normalised;""")
+        rows1 = cur1.fetchall()
+        for row1 in rows1:
+            changefrom = row1[0]
+            changeto   = row1[1]
+            print(changefrom, "-->", changeto)
+            cur2.execute("UPDATE term_phrase SET normalised = ? WHERE normalised = ?;", (changeto, changefrom))
+
+        con.commit()
+
+        cur1.execute("DELETE FROM term_normalised;")
+        cur1.execute("DELETE FROM term_bag;")
+        cur1.execute("DELETE FROM token;")
+        cur1.execute("DELETE FROM token_similarity;")
+
+        # --- select normalised MWT candidates
+        cur1.execute("""INSERT INTO term_normalised(normalised)
+                        SELECT normalised FROM (
+                        SELECT normalised, COUNT(*) AS t
+                        FROM   term_phrase
+                        WHERE  LENGTH(normalised) > 5
+                        AND    normalised GLOB '[a-z0-9]*'
+                        AND    normalised LIKE '% %'
+                        GROUP BY normalised
+                        HAVING t > 1);""")
+
+        # --- tokenise normalised MWT candidates into bags of words: rowid -> tokens
+        cur1.execute("SELECT rowid, normalised FROM term_normalised;")
+        bags = {row1[0]: row1[1].split() for row1 in cur1.fetchall()}
+
+        # --- store tokens as bags of words
+        cur2.executemany("INSERT INTO term_bag(id, token) VALUES(?,?);", [(id, token) for id in bags for token in bags[id]])
+        cur2.executemany("UPDATE term_normalised SET len = ? WHERE rowid = ?;", [(len(bags[id]), id) for id in bags])
+        self.bags = bags
+
+        con.commit()
+
+        run_time = self.perf.stop(normalised=self.count("term_normalised"))
+
+        print(f"Term candidates re-normalised in {run_time:0.4f} seconds")
+
+    # --- normalise tokens
+    def normalise_tokens(self):
+
+        from similarity import similar_tokens
+
+        con = self.con
+        cur1 = con.cursor()
+        cur2 = con.cursor()
+
+        self.perf.start("normalise tokens")
+
+        # --- extract vocabulary of MWT candidates, i.e. select distinct tokens
+        cur1.execute("INSERT INTO token(token) SELECT DISTINCT token FROM term_bag;")
+
+        # --- index tokens for faster retrieval
+        cur1.execute("CREATE INDEX idx05 ON token(token);")
+
+        # --- compare tokens so that similar ones can be normalised
+        # --- NOTE: for efficiency, only tokens of similar length that start with
+        #           the same letter or potential ligature (ae, oe) are compared
+        cur1.execute("SELECT token FROM token;")
+        tokens = [row1[0] for row1 in cur1.fetchall()]
+        pairs, compared = similar_tokens(tokens, self.config["Smin"], self.config["processes"])
+        cur2.executemany("INSERT INTO token_similarity(token1, token2) VALUES(?,?)", pairs)
+
+        # --- A -> B, B -> C, A -> C, then ignore B -> C and use A to normalise both B and C,
+        #     i.e. a token is changed to a similar (alphabetically smaller) token that is
+        #     not changed itself; if there are several, the smallest one is used
+        changed = set([pair[1] for pair in pairs])
+        canonical = {}
+        for (changeto, changefrom) in pairs:
+            if changeto in changed: continue
+            print(changefrom, "\t-->", changeto)
+            canonical.setdefault(changefrom, changeto)
+
+        # --- re-normalise the MWT candidates using similar tokens
+        bags = self.bags
+        for id in bags: bags[id] = [canonical.get(token, token) for token in bags[id]]
+
+        # --- rewrite the bags of words and expanded forms in bulk
+        cur1.execute("DELETE FROM term_bag;")
+        cur1.executemany("INSERT INTO term_bag(id, token) VALUES(?,?);", [(id, token) for id in bags for token in bags[id]])
+        cur1.executemany("UPDATE term_normalised SET expanded = ? WHERE rowid = ?;", [(" ".join(sorted(bags[id])), id) for id in bags])
+        con.commit()
+
+        # --- speed up searching through the bags of words
+        cur1.execute("CREATE INDEX idx06 ON term_bag(id);")
+        cur1.execute("CREATE INDEX idx07 ON term_bag(id, token);")
+        con.commit()
+
+        run_time = self.perf.stop(tokens=len(tokens), compared=compared, similar=len(pairs))
+
+        print(f"Tokens normalised in {run_time:0.4f} seconds")
+
+    # --- identify nested MWTs and calculate termhood
+    def calculate_termhood(self):
+
+        import numpy as np
+        import termhood
+
+        con = self.con
+        cur1 = con.cursor()
+        cur2 = con.cursor()
+
+        self.perf.start("termhood")
+
+        # --- speed up searching through the phrases
+        cur1.execute("CREATE INDEX IF NOT EXISTS idx08 ON term_phrase(normalised);")
+        cur1.execute("CREATE INDEX IF NOT EXISTS idx09 ON term_normalised(normalised);")
+        cur1.execute("CREATE INDEX IF NOT EXISTS idx10 ON term_normalised(expanded);")
+        con.commit()
+
+        ###
+        cur1.execute("DELETE FROM term_nested_aux;")
+        cur1.execute("DELETE FROM term_nested;")
+        ###
+
+        # --- select nested MWT pairs: bag of words of the child is a subset of the parent's
+        if self.bags == None: self.bags = self.stored_bags()
+        nested = nested_pairs(self.bags)
+        cur1.executemany("INSERT INTO term_nested_aux(parent, child) VALUES(?,?)", nested)
+
+        # --- select unique nested MWT pairs
+        cur1.execute("""INSERT INTO term_nested(parent, child)
+                        SELECT DISTINCT N1.expanded, N2.expanded
+                        FROM   term_normalised N1, term_normalised N2, term_nested_aux A
+                        WHERE  N1.rowid = A.parent
+                        AND    N2.rowid = A.child
+                        AND    N1.expanded <> N2.expanded;""") # --- proper subsets only
+        con.commit()
+
+        cur1.execute("CREATE INDEX IF NOT EXISTS idx11 ON term_nested(parent);")
+        cur1.execute("CREATE INDEX IF NOT EXISTS idx12 ON term_nested(child);")
+        con.commit()
+
+        # --- calculate termhood
+
+        ###
+        cur1.execute("DELETE FROM term_termhood;")
+        cur1.execute("DELETE FROM term_output;")
+        ###
+
+        cur1.execute("""INSERT INTO term_termhood(expanded, len, s, nf)
+                        SELECT DISTINCT expanded, len, 0, 0 FROM term_normalised;""")
+
+        # --- terms: rowid, expanded form and length
+        cur1.execute("SELECT rowid, expanded, len FROM term_termhood;")
+        rows1 = cur1.fetchall()
+        index = {row1[1]: i for i, row1 in enumerate(rows1)}
+        length = np.array([row1[2] for row1 in rows1], dtype=np.int64)
+
+        # --- calculate frequency of standalone occurrence
+        cur1.execute("""SELECT N.expanded, COUNT(*)
+                        FROM   term_normalised N, term_phrase P
+                        WHERE  N.normalised = P.normalised
+                        GROUP BY N.expanded;""")
+        f = termhood.counts(cur1.fetchall(), index)
+
+        # --- calculate the number of parent (superset) MWTs
+        cur1.execute("SELECT child, COUNT(*) FROM term_nested GROUP BY child;")
+        s = termhood.counts(cur1.fetchall(), index)
+
+        # --- calculate the frequency of nested occurrence
+        cur1.execute("""SELECT child, COUNT(*)
+                        FROM   term_nested N, term_normalised C, term_phrase P
+                        WHERE  N.parent = C.expanded
+                        AND    C.normalised = P.normalised
+                        GROUP BY child;""")
+        nf = termhood.counts(cur1.fetchall(), index)
+
+        # --- add up frequencies (both nested and standalone): f(t)
+        f = f + nf
+
+        # --- calculate C-value
+        # --- NOTE: no ln(x) in sqlite, so have to calculate C-value externally
+        c = termhood.cValue(length, f, s, nf)
+
+        cur2.executemany("UPDATE term_termhood SET f = ?, s = ?, nf = ?, c = ? WHERE rowid = ?;",
+                         zip(f.tolist(), s.tolist(), nf.tolist(), c.tolist(), [row1[0] for row1 in rows1]))
+
+        # --- store term list
+        cur1.execute("""INSERT INTO term_output(id, variant, c, f)
+                        SELECT T.rowid, LOWER(P.phrase) as variant, T.c, COUNT(*)
+                        FROM   term_termhood T, term_normalised N, term_phrase P
+                        WHERE  T.expanded = N.expanded
+                        AND    N.normalised = P.normalised
+                        AND    T.f > ?
+                        AND    T.c > ?
+                        GROUP BY T.rowid, variant, T.c;""", (self.config["Fmin"], self.config["Cmin"]))
+
+        # --- delete outliers: highly ranked terms that have a single variant with frequency of 1
+        #     (e.g. kappa b), which is ranked highly only because of nested frequency
+        cur1.execute("""SELECT id FROM term_output O WHERE f <= ?
+                        AND    1 = (SELECT COUNT(*) FROM term_output I WHERE O.id = I.id);""", (self.config["Fmin"],))
+        cur2.executemany("DELETE FROM term_output WHERE id = ?;", cur1.fetchall())
+
+        # --- n = total number of documents (to calculate IDF later on)
+        cur1.execute("SELECT COUNT(*) FROM data_document;")
+        self.n = cur1.fetchone()[0]
+        con.commit()
+
+        run_time = self.perf.stop(nested=len(nested), terms=self.count("term_termhood"), variants=self.count("term_output"))
+
+        print(f"Termhood calculated in {run_time:0.4f} seconds")
+
+    # --- find term occurrences in text
+    def find_occurrences(self):
+
+        import matching
+        import numpy as np
+        import spacy
+        import termhood
+        from spacy.tokens import DocBin
+
+        con = self.con
+        cur1 = con.cursor()
+        cur2 = con.cursor()
+
+        self.perf.start("occurrences")
+
+        cur1.execute("DELETE FROM output_label;")
+
+        print("Retrieving terms to match...")
+        cur1.execute("SELECT id, variant FROM term_output;")
+        ids = {} # --- variant -> term ids
+        for row1 in cur1.fetchall(): ids.setdefault(row1[1], []).append(str(row1[0]))
+        variants = list(ids.keys())
+
+        # --- occurrences stored by the previous runs are those of the variants matched then
+        #     in the documents matched then, so only the other ones need to be looked up
+        cur1.execute("SELECT variant FROM term_occurrence_variant;")
+        matched = set([row1[0] for row1 in cur1.fetchall()])
+        cur1.execute("SELECT id FROM data_document WHERE id NOT IN (SELECT doc_id FROM term_occurrence_document);")
+        unmatched = set([row1[0] for row1 in cur1.fetchall()]) # --- new or modified documents
+        new = [variant for variant in variants if variant not in matched]
+
+        # --- forget occurrences of variants that are no longer terms
+        cur1.execute("CREATE INDEX IF NOT EXISTS idx21 ON term_occurrence(variant);")
+        cur1.executemany("DELETE FROM term_occurrence WHERE variant = ?;", [(variant,) for variant in matched - set(variants)])
+
+        # --- number of documents, unless counted by this run (see calculate_termhood)
+        if self.n == None: self.n = self.count("data_document")
+
+        # --- documents to look in: all variants in new documents, new variants in the other ones
+        lookups = []
+        if len(unmatched) > 0: lookups.append((variants, unmatched))
+        if len(new) > 0 and len(unmatched) < self.n:
+            cur1.execute("SELECT doc_id FROM term_occurrence_document;")
+            lookups.append((new, set([row1[0] for row1 in cur1.fetchall()])))
+
+        if len(lookups) > 0:
+
+            # --- documents parsed by the previous run, unless loaded by this one
+            if self.docs == None: self.docs = DocBin(store_user_data=True).from_disk(self.docs_file)
+
+            # --- tokenise term variants, reusing patterns saved by the previous run
+            # --- NOTE: if the language model is not loaded, all patterns saved by the previous run
+            #           are reused and the model is loaded only if there are new term variants
+            nlp = self.nlp if self.nlp != None else spacy.blank(lang)
+            saved = matching.saved(self.patterns_file, nlp.vocab, matching.model(nlp) if self.nlp != None else None)
+            if any([variant not in saved for variant in variants]):
+                nlp = self.model()
+                saved = matching.saved(self.patterns_file, nlp.vocab, matching.model(nlp))
+            patterns, reused = matching.tokenise(nlp, variants, saved)
+            if reused < len(patterns): matching.save(self.patterns_file, nlp, variants, patterns)
+            print(len(patterns), "patterns,", reused, "reused")
+            patterns = dict(zip(variants, patterns))
+
+            print("Looking up terms in documents...")
+            lookups = [(keys, [patterns[key] for key in keys], only) for keys, only in lookups]
+            total = sum([len(lookup[2]) for lookup in lookups])
+            i = 0
+            for doc_id, found in matching.occurrences(self.docs, nlp, lookups, self.config["processes"]):
+
+                # --- progress bar
+                i += 1
+                sys.stdout.write('\r')
+                p = int(100*i/total)
+                sys.stdout.write("[%-100s] %d%%" % ('='*p, p))
+                sys.stdout.flush()
+
+                cur2.executemany("INSERT INTO term_occurrence(doc_id, start, offset, variant) VALUES (?,?,?,?);",
+                                 [(doc_id, s, o, variant) for (s, o, variant) in found])
+            print()
+
+        # --- the stored occurrences now cover all variants in all documents
+        cur1.executemany("INSERT INTO term_occurrence_document(doc_id) VALUES (?);", [(doc_id,) for doc_id in unmatched])
+        cur1.execute("DELETE FROM term_occurrence_variant;")
+        cur1.executemany("INSERT INTO term_occurrence_variant(variant) VALUES (?);", [(variant,) for variant in variants])
+
+        print("Labelling term occurrences...")
+        cur1.execute("CREATE INDEX IF NOT EXISTS idx20 ON term_occurrence(doc_id);")
+        cur1.execute("SELECT doc_id, start, offset, variant FROM term_occurrence ORDER BY doc_id;")
+        documents = {} # --- label -> number of documents
+        for doc_id, rows1 in itertools.groupby(cur1, key=lambda row1: row1[0]):
+
+            # --- labels of the terms whose variants were found, in the order of their positions
+            found = sorted(set([(row1[1], row1[2], term_id) for row1 in rows1 for term_id in ids[row1[3]]]),
+                           key=lambda label: (label[0], label[1], int(label[2])))
+
+            # --- count documents before nested and overlapping labels are removed
+            for term_id in set([label[2] for label in found]): documents[term_id] = documents.get(term_id, 0) + 1
+
+            # --- delete nested labels, then overlapping labels
+            cur2.executemany("INSERT INTO output_label(doc_id, start, offset, label) VALUES (?,?,?,?);",
+                             [(doc_id, s, o, term_id) for (s, o, term_id) in resolve(found)])
+
+        # --- update document frequency
+        labels = list(documents.keys())
+        df     = np.array([documents[label] for label in labels], dtype=np.int64)
+        cur2.executemany("UPDATE term_output SET df=?, idf=? WHERE id = ?;", zip(df.tolist(), termhood.idf(self.n, df).tolist(), labels))
+
+        # --- delete terms that have no occurrences (it may happen
+        #     when they are nested in a term, which was mistagged)
+        cur1.execute("DELETE FROM term_output WHERE id NOT IN (SELECT label FROM output_label);")
+
+        con.commit()
+
+        run_time = self.perf.stop(labels=self.count("output_label"), terms=self.count("term_output"))
+
+        print(f"Term occurrences annotated in {run_time:0.4f} seconds")
+
+    # --- annotate term occurrences in text
+    def export_annotations(self):
+
+        con = self.con
+        cur1 = con.cursor()
+
+        self.perf.start("annotations")
+
+        cur1.execute("CREATE INDEX IF NOT EXISTS idx13 ON term_output(id);")
+        cur1.execute("CREATE INDEX IF NOT EXISTS idx14 ON term_output(c, id, f);")
+        cur1.execute("CREATE INDEX IF NOT EXISTS idx15 ON output_label(doc_id);")
+        cur1.execute("CREATE INDEX IF NOT EXISTS idx16 ON output_label(label);")
+        cur1.execute("CREATE INDEX IF NOT EXISTS idx17 ON output_label(label, doc_id);")
+        con.commit()
+
+        # --- coloring options for spacy's PhraseMatcher
+        entities, self.colors = self.term_colors()
+        options = {"ents": entities, "colors": self.colors}
+
+        # --- export spacy-formatted entity annotations: annotations.json or annotations.jsonl
+        annotations_format = self.config["annotations"]
+        export.annotations_json(self.output / ("annotations." + annotations_format), export.annotations(con), annotations_format)
+
+        # --- visualise annotations and export HTML visualisation/annotation
+        export.corpus(self.output / "corpus.html", export.annotations(con), options, self.config["page_size"], self.config["processes"])
+
+        run_time = self.perf.stop(documents=self.count("data_document"), labels=self.count("output_label"))
+
+        print(f"Term occurrences exported in {run_time:0.4f} seconds")
+
+    # --- term ids and their colors, ranked by C-value
+    def term_colors(self):
+
+        cur1 = self.con.cursor()
+
+        # --- top C-value score
+        cur1.execute("SELECT MAX(c) FROM term_output;")
+        top = cur1.fetchone()[0]
+
+        random_colors = True
+
+        # --- asign colors to terms
+        entities = []
+        colors = {"ENT":"#E8DAEF"}
+
+        cur1.execute("SELECT DISTINCT id, c FROM term_output ORDER BY c DESC;")
+        rows1 = cur1.fetchall()
+        for row1 in rows1:
+            id = row1[0]
+            c  = row1[1]
+            entities.append(str(id))
+            color = transition3(top-c, top)
+            colors[str(id)] = color
+
+        if random_colors:
+            color = color_generator(len(entities))
+            for i in range(len(entities)): colors[entities[i]] = color[i]
+
+        return entities, colors
+
+    # --- extract concordances
+    def export_concordances(self):
+
+        self.perf.start("concordances")
+
+        if self.colors == None: self.colors = self.term_colors()[1]
+
+        # --- write concordances to an HTML file
+        export.concordances(self.con, self.output / "concordances.html", self.colors)
+
+        run_time = self.perf.stop(labels=self.count("output_label"))
+
+        print(f"Concordances extracted in {run_time:0.4f} seconds")
+
+    # --- export terminology (lexicon)
+    def export_terminology(self):
+
+        self.perf.start("terminology")
+
+        if self.colors == None: self.colors = self.term_colors()[1]
+
+        # --- export terminology into a CSV file
+        export.terminology_csv(self.con, self.output / "terminology.csv")
+
+        # --- export terminology into an HTML file
+        export.terminology_html(self.con, self.output / "terminology.html", self.colors)
+
+        run_time = self.perf.stop(terms=self.count("term_output", "DISTINCT id"), variants=self.count("term_output"))
+
+        print(f"Terminology exported in {run_time:0.4f} seconds")
@@ -0,0 +1,193 @@
+# --- FlexiTerm: local term extraction service
+
+# --- a long-running HTTP service that keeps the pipeline loaded (the settings,
+#     the spaCy model, stoplists and term formation patterns), so that the time
+#     of a job depends on its corpus rather than on the start-up; jobs are queued
+#     and run by a number of worker processes, each with a pipeline (and a language
+#     model) and a database of its own
+#
+#     POST /jobs       {"documents": {"name": "text", ...} or ["text", ...],
+#                       "settings": {"Cmin": 2, ...},      (optional, see job_settings)
+#                       "wait": true}                      (optional: reply when the job is done)
+#                      -> {"id": ..., "status": "queued"}
+#                      (the body must be sent as Content-Type: application/json)
+#     GET  /jobs/<id>  -> {"id": ..., "status": "queued" | "running" | "done" | "failed",
+#                          "terminology": [...], "annotations": [...], "performance": [...]}
+#                         (or "error" if the job failed)
+
+import csv
+import json
+import multiprocessing
+import os
+import shutil
+import threading
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# --- number of finished jobs whose results are kept
+history = 100
+
+# --- settings a job may change: the others (e.g. stoplist, cache, processes) name
+#     files or use resources of the server, so only its own settings are used
+job_settings = ["Smin", "Amin", "Fmin", "Cmin", "acronyms", "annotations"]
+
+# --- columns of terminology.csv and their types
+columns = {"id": int, "variant": str, "c": float, "f": int, "df": int, "c_idf": float}
+
+
+# --- terminology.csv as a list of rows: column -> value
+def terminology(path):
+    with open(path, "r", encoding="utf8") as file:
+        return [{name: columns[name](value) for name, value in row.items()} for row in csv.DictReader(file, delimiter="\t")]
+
+# --- annotations.json or annotations.jsonl as a list of documents
+def annotations(path):
+    with open(path, "r") as file:
+        if path.suffix == ".jsonl": return [json.loads(line) for line in file]
+        return json.load(file)
+
+
+# --- a worker process: runs queued jobs one at a time with its own pipeline and database
+# --- NOTE: the language model is loaded once per process, before the first job
+def work(flexiterm, jobs, results, folder, worker):
+
+    flexiterm.model()
+
+    database = os.path.join(folder, "worker_" + str(worker) + ".sqlite")
+
+    try:
+        for job in iter(jobs.get, None):
+            results.put({"id": job["id"], "status": "running"})
+            path = os.path.join(folder, "jobs", job["id"])
+            result = {"id": job["id"]}
+            try:
+                result["performance"] = flexiterm.run(os.path.join(path, "text"), job["settings"], database, os.path.join(path, "out"))
+                result["terminology"] = terminology(flexiterm.output / "terminology.csv")
+                result["annotations"] = annotations(flexiterm.output / ("annotations." + flexiterm.config["annotations"]))
+                result["status"] = "done"
+            except Exception as error:
+                result["error"] = str(error)
+                result["status"] = "failed"
+            finally:
+                shutil.rmtree(path, ignore_errors=True)
+            results.put(result)
+    except KeyboardInterrupt: # --- interrupted with the service
+        pass
+
+
+class Service:
+
+    # --- flexiterm: a pipeline, copied to each worker process
+    def __init__(self, flexiterm, folder="./service", workers=1):
+
+        self.folder = folder
+        self.jobs = {} # --- id -> job
+        self.queue = multiprocessing.Queue()
+        self.results = multiprocessing.Queue()
+        self.finished = deque() # --- ids of finished jobs, the oldest first
+
+        os.makedirs(os.path.join(folder, "jobs"), exist_ok=True)
+
+        self.workers = [multiprocessing.Process(target=work, args=(flexiterm, self.queue, self.results, folder, worker + 1))
+                        for worker in range(workers)]
+        for worker in self.workers: worker.start()
+
+        threading.Thread(target=self.collect, daemon=True).start()
+
+    # --- queue a corpus: documents are written to the text folder of the job
+    def submit(self, documents, settings=None):
+
+        if type(documents) == list: documents = {"%07d.txt" % (i+1): text for i, text in enumerate(documents)}
+        if type(documents) != dict or len(documents) == 0: raise ValueError("No documents given.")
+        for name in documents:
+            if name != os.path.basename(name) or name.startswith("."): raise ValueError("Invalid document name: " + name)
+            if type(documents[name]) != str: raise ValueError("Invalid document: " + name)
+        if settings != None and type(settings) != dict: raise ValueError("Invalid settings.")
+        for name in settings or {}:
+            if name not in job_settings: raise ValueError("Setting cannot be changed by a job: " + name)
+
+        id = uuid.uuid4().hex
+        job = {"id": id, "status": "queued", "done": threading.Event(), "settings": settings}
+        folder = os.path.join(self.folder, "jobs", id)
+        os.makedirs(os.path.join(folder, "text"))
+        os.makedirs(os.path.join(folder, "out"))
+        for name in documents:
+            with open(os.path.join(folder, "text", name), "w", encoding="utf8") as file: file.write(documents[name])
+
+        self.jobs[id] = job
+        self.queue.put({"id": id, "settings": settings})
+        return job
+
+    # --- update the jobs with the status and results sent by the workers
+    def collect(self):
+
+        while True:
+            result = self.results.get()
+            job = self.jobs[result["id"]]
+            job.update(result)
+            if job["status"] not in ["done", "failed"]: continue
+            job["done"].set()
+
+            # --- forget the oldest results
+            self.finished.append(job["id"])
+            while len(self.finished) > history: self.jobs.pop(self.finished.popleft(), None)
+
+    # --- stop the workers once they have finished their current jobs
+    def stop(self):
+        for worker in self.workers: self.queue.put(None)
+        for worker in self.workers: worker.join()
+
+    # --- a job as returned to the client
+    def result(self, job):
+        return {name: value for name, value in list(job.items()) if name not in ["done", "settings"]}
+
+
+def handler(service):
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def reply(self, status, body):
+            content = json.dumps(body).encode("utf8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def do_POST(self):
+            if self.path != "/jobs": return self.reply(404, {"error": "Not found: " + self.path})
+            # --- NOTE: a browser cannot send JSON to another site without asking first, so web pages cannot queue jobs
+            if self.headers.get("Content-Type", "").split(";")[0].strip().lower() != "application/json":
+                return self.reply(415, {"error": "Content-Type must be application/json"})
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                job = service.submit(request.get("documents"), request.get("settings"))
+            except (ValueError, AttributeError) as error:
+                return self.reply(400, {"error": str(error)})
+            if request.get("wait", False):
+                job["done"].wait()
+                return self.reply(200, service.result(job))
+            self.reply(202, service.result(job))
+
+        def do_GET(self):
+            job = service.jobs.get(self.path[len("/jobs/"):]) if self.path.startswith("/jobs/") else None
+            if job == None: return self.reply(404, {"error": "Not found: " + self.path})
+            self.reply(200, service.result(job))
+
+    return Handler
+
+
+# --- serve requests until interrupted
+def serve(flexiterm, host="127.0.0.1", port=8000, workers=1, folder="./service"):
+
+    service = Service(flexiterm, folder, workers)
+    server = ThreadingHTTPServer((host, port), handler(service))
+    print("FlexiTerm service on http://" + host + ":" + str(port) + "/jobs with " + str(workers) + " worker(s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+    service.stop()
@@ -0,0 +1,71 @@
+# --- FlexiTerm: token similarity
+
+# --- NOTE: for efficiency, only tokens of similar length that start with the
+#           same letter or potential ligature (ae, oe) are compared, so the
+#           vocabulary is split into blocks of tokens that share the first
+#           letter and length, and only compatible blocks are compared,
+#           optionally in parallel
+
+import jellyfish
+from bisect import bisect_right
+from multiprocessing import Pool
+
+
+# --- blocks shared with worker processes
+blocks = {}
+threshold = 1.0
+
+def init(shared_blocks, shared_threshold):
+    global blocks, threshold
+    blocks = shared_blocks
+    threshold = shared_threshold
+
+
+# --- blocks to compare a given block with
+def neighbours(key):
+    (letter, length) = key
+    letters = [letter]
+    if letter == 'e': letters += ['a', 'o'] # --- potential ligatures
+    for other in letters:
+        for other_length in (length-1, length, length+1):
+            if (other, other_length) in blocks: yield (other, other_length)
+
+
+# --- compare a block with its neighbours: pairs (t1, t2) where t1 < t2 and sim(t1, t2) > threshold
+#     and the number of pairs compared
+def compare(key):
+    pairs = []
+    compared = 0
+    tokens1 = blocks[key]
+    for other in neighbours(key):
+        tokens2 = blocks[other]
+        for t1 in tokens1:
+            candidates = tokens2[bisect_right(tokens2, t1):] # --- t1 < t2
+            compared += len(candidates)
+            for t2 in candidates:
+                if jellyfish.jaro_winkler_similarity(t1, t2) > threshold:
+                    pairs.append((t1, t2))
+    return pairs, compared
+
+
+# --- find all pairs of similar tokens, return them with the number of pairs compared
+def similar_tokens(tokens, Smin, processes=1):
+
+    # --- ignore tokens that contain digits as these may be significant
+    tokens = [token for token in tokens if len(token) > 0 and not any(c.isdigit() for c in token)]
+
+    # --- split the vocabulary into blocks: (first letter, length) -> sorted tokens
+    shared = {}
+    for token in tokens: shared.setdefault((token[0:1], len(token)), []).append(token)
+    for key in shared: shared[key].sort()
+    keys = sorted(shared.keys(), key=lambda key: -len(shared[key])) # --- largest blocks first
+
+    if processes > 1 and len(keys) > 1:
+        with Pool(processes, initializer=init, initargs=(shared, Smin)) as pool:
+            results = pool.map(compare, keys, chunksize=1)
+    else:
+        init(shared, Smin)
+        results = [compare(key) for key in keys]
+
+    pairs = sorted([pair for result in results for pair in result[0]])
+    return pairs, sum([result[1] for result in results])
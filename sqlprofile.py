@@ -0,0 +1,140 @@
+# --- FlexiTerm: SQL profiler
+
+# --- opt-in (--profile-sql): every statement executed through a cursor is timed
+#     (including fetching its rows) and every statement run by SQLite is counted
+#     through the trace hook; statements are grouped by their normalised text and
+#     the pipeline stage, and the query plans of the slowest ones are explained
+#     so that full table scans stand out
+
+import json
+import re
+import sqlite3
+import time
+
+
+# --- number of the slowest statements to explain
+slowest = 20
+
+literals = re.compile("'(?:[^']|'')*'|(?<![\\w.])-?\\d+(?:\\.\\d+)?(?![\\w.])")
+spaces   = re.compile("\\s+")
+
+# --- SQL text without literal values and extra white space
+def normalise(sql):
+    return spaces.sub(" ", literals.sub("?", sql)).strip().rstrip(";").strip()
+
+
+class Cursor(sqlite3.Cursor):
+
+    statement = None # --- (sql, parameters) of the last statement
+
+    # --- time spent fetching rows is added to the statement that returned them
+    def timed(self, function, *args):
+        start = time.perf_counter()
+        try: return function(*args)
+        finally: self.connection.profiler.add_time(self.statement, time.perf_counter() - start)
+
+    def execute(self, sql, parameters=()):
+        self.statement = (sql, parameters)
+        return self.timed(super().execute, sql, parameters)
+
+    def executemany(self, sql, parameters):
+        self.statement = (sql, None)
+        return self.timed(super().executemany, sql, parameters)
+
+    def executescript(self, script):
+        self.statement = None # --- statements are only counted
+        return super().executescript(script)
+
+    def fetchone(self):
+        return self.timed(super().fetchone)
+
+    def fetchmany(self, *args):
+        return self.timed(super().fetchmany, *args)
+
+    def fetchall(self):
+        return self.timed(super().fetchall)
+
+    def __next__(self):
+        return self.timed(super().__next__)
+
+
+class Connection(sqlite3.Connection):
+
+    profiler = None
+
+    def cursor(self, factory=Cursor):
+        return super().cursor(factory)
+
+    # --- shortcuts, so that their statements are timed too
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        return self.cursor().executemany(sql, parameters)
+
+
+class Profiler:
+
+    def __init__(self):
+        self.stage = "setup"
+        self.statements = {} # --- (stage, normalised SQL) -> statistics
+
+    def get(self, sql):
+        key = (self.stage, normalise(sql))
+        if key not in self.statements:
+            self.statements[key] = {"stage": key[0], "sql": key[1], "executions": 0, "calls": 0, "time": 0.0, "text": None, "parameters": None}
+        return self.statements[key]
+
+    # --- trace hook: a statement run by SQLite
+    def trace(self, sql):
+        self.get(sql)["executions"] += 1
+
+    # --- time spent on a statement (sql, parameters) executed through a cursor
+    def add_time(self, statement, seconds):
+        if statement == None: return
+        (sql, parameters) = statement
+        entry = self.get(sql)
+        entry["time"] += seconds
+        entry["calls"] += 1
+        entry["text"] = sql
+        if parameters != None: entry["parameters"] = parameters
+
+    # --- a database connection whose statements are profiled
+    def connect(self, database):
+        con = sqlite3.connect(database, factory=Connection)
+        con.profiler = self
+        con.set_trace_callback(self.trace)
+        return con
+
+    # --- explain how SQLite runs a statement and flag full table scans
+    def explain(self, con, entry):
+        sql = entry["text"]
+        if sql == None or not entry["sql"].split(" ")[0].upper() in ["SELECT", "INSERT", "UPDATE", "DELETE"]: return
+        parameters = entry["parameters"] if entry["parameters"] != None else [None] * sql.count("?")
+        con.set_trace_callback(None)
+        try:
+            plan = [row[3] for row in sqlite3.Cursor.execute(con.cursor(sqlite3.Cursor), "EXPLAIN QUERY PLAN " + sql, parameters)]
+            entry["plan"] = plan
+            entry["full_scans"] = [step for step in plan if step.startswith("SCAN ") and " USING " not in step and "CONSTANT ROW" not in step]
+        except (sqlite3.Error, ValueError) as error:
+            entry["plan"] = "not available: " + str(error)
+        finally:
+            con.set_trace_callback(self.trace)
+
+    # --- export the statistics as JSON, the slowest statements first
+    def report(self, con, path):
+        entries = sorted(self.statements.values(), key=lambda entry: -entry["time"])
+        for entry in entries[:slowest]: self.explain(con, entry)
+        stages = {}
+        for entry in entries:
+            stage = stages.setdefault(entry["stage"], {"stage": entry["stage"], "statements": 0, "executions": 0, "time": 0.0})
+            stage["statements"] += 1
+            stage["executions"] += entry["executions"]
+            stage["time"] += entry["time"]
+        for entry in entries:
+            del entry["text"]
+            entry["time"] = round(entry["time"], 6)
+            entry["parameters"] = None if entry["parameters"] == None else [str(value)[:100] for value in entry["parameters"]]
+        for stage in stages.values(): stage["time"] = round(stage["time"], 6)
+        with open(path, "w", encoding="utf8") as file:
+            json.dump({"stages": list(stages.values()), "statements": entries}, file, indent=4)
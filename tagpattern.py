@@ -0,0 +1,29 @@
+# --- FlexiTerm: term formation patterns
+
+# --- a pattern (see the settings) is a regular expression over the POS tags of
+#     a sentence separated by single spaces, e.g. "JJ NN IN DT NN"; matches are
+#     converted into token positions by counting the spaces between consecutive 
+#     matches, i.e. in a single pass over the sentence, rather than by counting 
+#     all the spaces in front of every match, which is quadratic in the length 
+#     of the sentence
+
+import re
+
+
+class TagPattern:
+
+    def __init__(self, pattern):
+        self.regex = re.compile(pattern)
+
+    # --- (start, length) of each match, where start is the position of the 
+    #     first token (counting from 1) and length is the number of tokens
+    def finditer(self, tags):
+        tokens = 0 # --- number of tokens before the current match
+        end = 0    # --- end of the previous match
+        for chunk in self.regex.finditer(tags):
+            (a, b) = chunk.span()
+            tokens += tags.count(' ', end, a)
+            length = tags.count(' ', a, b) + 1
+            yield tokens+1, length
+            tokens += length - 1
+            end = b
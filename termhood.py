@@ -0,0 +1,36 @@
+# --- FlexiTerm: termhood
+
+# --- C-value and IDF calculated for all terms at once; the counts are loaded
+#     into arrays so that the results can be written back in bulk
+
+import math
+import numpy as np
+
+
+# --- apply a function from the math module element-wise
+# --- NOTE: numpy may implement logarithms differently, so the function is only
+#     called once per unique value to reproduce the previous results exactly
+def apply(function, values):
+    unique, inverse = np.unique(values, return_inverse=True)
+    return np.array([function(value) for value in unique.tolist()], dtype=float)[inverse.reshape(-1)]
+
+
+# --- counts per key as an array aligned with the index: key -> position
+def counts(rows, index):
+    values = np.zeros(len(index), dtype=np.int64)
+    if len(rows) > 0:
+        keys, numbers = zip(*rows)
+        values[[index[key] for key in keys]] = numbers
+    return values
+
+
+# --- C-value (collocation)
+def cValue(length, f, s, nf):
+    c = f.astype(float)
+    nested = s > 0
+    c[nested] -= nf[nested] / s[nested]
+    return c * apply(math.log, length)
+
+# --- inverse document frequency (discriminativeness)
+def idf(n, df):
+    return apply(math.log10, n / df)
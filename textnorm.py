@@ -0,0 +1,143 @@
+# --- FlexiTerm: text normalisation
+
+# --- helpers applied to every document (pretagging, hyphen), every token (prestem)
+#     and every acronym candidate (greek2english); the rules are compiled once and
+#     combined into as few passes over the text as possible without changing the
+#     output, see bench/bench_textnorm.py
+
+import re
+
+
+# --- fix potential tagging issues
+
+unit = ["meter",
+        "metre",
+        "mile",
+        "centi",
+        "milli",
+        "kilo",
+        "gram",
+        "sec",
+        "min",
+        "hour",
+        "hr",
+        "day",
+        "week",
+        "month",
+        "year",
+        "liter",
+        "litre"]
+
+abbr = ["m",
+        "cm",
+        "mm",
+        "kg",
+        "g",
+        "mg",
+        "s",
+        "h",
+        "am",
+        "pm",
+        "l",
+        "ml"]
+
+# --- NOTE: inserting a space after a digit neither creates nor removes a match
+#     for any other unit, so a single pass over all units is enough
+units = re.compile("(\\d)(?=" + "|".join(unit + abbr) + ")")
+
+repetitive = re.compile("([!?.\\-_~])\\1+")
+slash      = re.compile("([a-z0-9])/([a-z0-9])", flags=re.IGNORECASE)
+gene       = re.compile("[ACGT ]{6,}")
+spaces     = re.compile("\\s+")
+
+def pretagging(txt):
+
+    # --- insert white space in front of a unit where necessary
+    txt = units.sub("\\1 ", txt)
+
+    # --- compress repetative punctuation into a single character
+    txt = repetitive.sub("\\1", txt)
+    txt = txt.replace("kappaB", "kappa B")
+    txt = slash.sub("\\1 / \\2", txt)
+    txt = txt.replace("(", " ( ").replace(")", " ) ")
+
+    # --- remove long gene sequences
+    txt = gene.sub("", txt)
+
+    # --- normalise white spaces
+    txt = spaces.sub(" ", txt)
+
+    # --- normalise non-ASCII characters
+    # ???: test with unicode characters
+    #txt = Normalizer.normalize(txt, Normalizer.Form.NFD);
+    #txt = txt.replaceAll("[^\\x00-\\x7F]", "");
+
+    return txt
+
+
+
+
+
+# --- remove a hyphen between 2 letters so that it does not mess up the tokenisation in spacy: -/HYPH
+# --- NOTE: not part of pretagging, because the hyphen is only ignored, not removed
+# --- NOTE: lookarounds do not consume the letters, so overlapping matches are replaced too,
+#     e.g. glutathione-S-transferase -> glutathione S transferase
+
+hyphens = re.compile("(?<=[a-z])\\-(?=[a-z])", flags=re.IGNORECASE)
+
+def hyphen(txt):
+    return hyphens.sub(" ", txt)
+
+
+
+
+
+# --- prepare lemma for stemming
+def prestem(lemma):
+
+    if len(lemma) > 1:
+        if lemma[0:1] == '-': lemma = lemma[1:]    # --- strip of hyphen at the start
+
+    if len(lemma) > 1:
+        if lemma[-1:] == '-': lemma = lemma[:-1]   # --- strip of hyphen at the end
+
+    lemma = lemma.replace('isation', 'ization')    # --- American spelling for consistent stemming
+
+    return lemma
+
+
+
+
+
+# --- alpha -> a: helps properly estimate the acronym length and simplifies matching against the long form
+
+def pad(string):
+    return " " + string + " "
+
+letters = ["alpha", "beta", "gamma", "delta", "epsilon", "zata", "eta", "theta", "iota","kappa", "lambda", "mu", "nu", "xi", "omikron", "pi", "rho", "sigma", "tau", "upsilon", "phi","chi", "psi", "omega"]
+
+# --- one group per letter, so that the letter can be identified by the group index
+greek = re.compile("(?<= )(?:" + "|".join(["(" + letter + ")" for letter in letters]) + ")(?= )", flags=re.IGNORECASE)
+
+def greek2english(string):
+
+    string = pad(string)
+
+    # --- NOTE: a letter used to be replaced together with the spaces around it, so
+    #     only every other letter in a row of the same letter was replaced, e.g.
+    #     alpha alpha alpha -> a alpha a; this is preserved for consistency
+    output = []
+    end = 0
+    previous = None # --- (letter, end) of the previous replacement
+    for match in greek.finditer(string):
+        letter = match.lastindex - 1
+        if previous == (letter, match.start() - 1):
+            previous = None
+        else:
+            output.append(string[end:match.start()])
+            output.append(letters[letter][0:1])
+            end = match.end()
+            previous = (letter, end)
+    output.append(string[end:])
+
+    return "".join(output).strip()